@@ -1,15 +1,30 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from app.services import Services
-from app.telegram.handlers import build_handlers as _build_handlers
-from app.telegram.worker_loop import worker_loop as _worker_loop
+if TYPE_CHECKING:
+    from app.services import Services
+
+
+# Backward-compatible re-exports. Imports are deferred to first use so importing
+# `app.bot` does not pull in the Telegram SDK and yt-dlp up front.
 
 
 def build_handlers(services: Services):
+    from app.telegram.handlers import build_handlers as _build_handlers
+
     return _build_handlers(services)
 
 
 async def worker_loop(application: Any) -> None:
+    from app.telegram.worker_loop import worker_loop as _worker_loop
+
     await _worker_loop(application)
+
+
+def __getattr__(name: str) -> Any:
+    if name == "Services":
+        from app.services import Services
+
+        return Services
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,61 +1,159 @@
 from __future__ import annotations
 
+import functools
+import mmap
 import os
+import re
+import sys
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Mapping, Optional
+
+
+_QUOTE_CHARS = ('"', "'")
+_TRUE_VALUES = frozenset(sys.intern(v) for v in ("1", "true", "yes", "y", "on"))
 
 
 def _strip_quotes(value: str) -> str:
     value = value.strip()
-    if len(value) >= 2 and value[0] == value[-1] and value[0] in {'"', "'"}:
+    if len(value) >= 2 and value.startswith(_QUOTE_CHARS) and value.endswith(value[0]):
         return value[1:-1]
     return value
 
 
-def load_dotenv(dotenv_path: Path) -> None:
+# One KEY=VALUE line. A value wrapped in matching quotes is unquoted; anything
+# else is taken verbatim (minus surrounding whitespace), same as `_strip_quotes`.
+# Works on raw bytes: only the matched key/value get decoded.
+_ENV_LINE_RE = re.compile(
+    rb"""^[ \t]*([^#=\s][^=\n]*?)[ \t]*=[ \t]*"""
+    rb"""(?:"([^\n]*)"|'([^\n]*)'|([^\n]*?))[ \t\r]*$""",
+    re.MULTILINE,
+)
+
+
+@functools.lru_cache(maxsize=4)
+def _parse_dotenv_file(path_str: str, mtime_ns: int) -> tuple[tuple[str, str], ...]:
+    """Parse a .env file into (key, value) pairs.
+
+    `mtime_ns` is only part of the cache key: an edited file gets re-parsed.
+    """
+
+    _ = mtime_ns
+    pairs: list[tuple[str, str]] = []
+    with open(path_str, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ()
+        # Scan the mapped file directly: no full-file copy, no list of lines.
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for m in _ENV_LINE_RE.finditer(data):
+                key, dq, sq, bare = m.groups()
+                if dq is not None:
+                    value = dq
+                elif sq is not None:
+                    value = sq
+                else:
+                    value = bare
+                pairs.append((key.decode("utf-8"), value.decode("utf-8")))
+    return tuple(pairs)
+
+
+def _dotenv_mtime_ns(dotenv_path: Path) -> Optional[int]:
+    try:
+        return os.stat(dotenv_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+_DOTENV_LOADED: dict[tuple[Path, int], dict[str, str]] = {}
+
+
+def load_dotenv(dotenv_path: Path) -> dict[str, str]:
     """Minimal .env loader (no external deps).
 
     - Lines: KEY=VALUE
     - Ignores empty lines and comments (#)
     - Does not override existing environment variables
+    - Parsed content is cached per (path, mtime); an unchanged file is applied once
+
+    Returns the effective values of the keys defined in the file (i.e. the
+    pre-existing environment value where one was set), as of the first load.
     """
 
-    if not dotenv_path.exists():
-        return
-
-    for raw_line in dotenv_path.read_text(encoding="utf-8").splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#"):
-            continue
-        if "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        key = key.strip()
-        value = _strip_quotes(value)
-        if not key:
-            continue
-        if key not in os.environ:
-            os.environ[key] = value
-
-
-def _env(name: str, *, default: Optional[str] = None) -> str:
-    value = os.getenv(name, default)
+    mtime_ns = _dotenv_mtime_ns(dotenv_path)
+    if mtime_ns is None:
+        return {}
+
+    # Values never override os.environ, so re-applying an unchanged file is a no-op.
+    loaded_key = (dotenv_path, mtime_ns)
+    applied = _DOTENV_LOADED.get(loaded_key)
+    if applied is not None:
+        return applied
+
+    applied = {}
+    for key, value in _parse_dotenv_file(str(dotenv_path), mtime_ns):
+        applied[key] = os.environ.setdefault(key, value)
+    _DOTENV_LOADED[loaded_key] = applied
+    return applied
+
+
+def _resolve_path(raw: str) -> Path:
+    path = Path(raw).expanduser()
+    # A relative path depends on the current directory; only absolute ones are cached.
+    return _resolve_abs_path(path) if path.is_absolute() else path.resolve()
+
+
+@functools.lru_cache(maxsize=32)
+def _resolve_abs_path(path: Path) -> Path:
+    # resolve() hits the filesystem for symlinks; an absolute path is a stable key.
+    return path.resolve()
+
+
+def _opt_path(name: str, *, resolve: bool = False, source: Mapping[str, str] = os.environ) -> Optional[Path]:
+    raw = source.get(name)
+    if not raw:
+        return None
+    return _resolve_path(raw) if resolve else Path(raw)
+
+
+_LOADED_PATHS: dict[Path, dict[str, str]] = {}
+_LOAD_LOCK = threading.Lock()
+
+
+def _ensure_env_loaded(project_root: Path) -> dict[str, str]:
+    """Run `load_dotenv` for `project_root/.env` at most once per process."""
+
+    with _LOAD_LOCK:
+        applied = _LOADED_PATHS.get(project_root)
+        if applied is None:
+            applied = load_dotenv(project_root / ".env")
+            _LOADED_PATHS[project_root] = applied
+        return applied
+
+
+def _env(name: str, *, default: Optional[str] = None, source: Mapping[str, str] = os.environ) -> str:
+    value = source.get(name, default)
     if value is None or value == "":
         raise RuntimeError(f"Missing required env var: {name}")
     return value
 
 
-def _env_bool(name: str, *, default: bool = False) -> bool:
-    raw = os.getenv(name)
+def _env_bool(name: str, *, default: bool = False, source: Mapping[str, str] = os.environ) -> bool:
+    raw = source.get(name)
     if raw is None:
         return default
-    return raw.strip().lower() in {"1", "true", "yes", "y", "on"}
-
-
-def _env_float(name: str, *, default: float) -> float:
-    raw = os.getenv(name)
-    if raw is None or raw.strip() == "":
+    value = raw.strip().lower()
+    # Interned short inputs compare against _TRUE_VALUES by identity; longer
+    # strings cannot match and are not worth adding to the intern table.
+    if len(value) > 8:
+        return False
+    return sys.intern(value) in _TRUE_VALUES
+
+
+def _env_float(name: str, *, default: float, source: Mapping[str, str] = os.environ) -> float:
+    raw = source.get(name)
+    # int()/float() accept surrounding whitespace, so no strip() copy is needed.
+    if not raw or raw.isspace():
         return default
     try:
         return float(raw)
@@ -63,9 +161,10 @@ def _env_float(name: str, *, default: float) -> float:
         raise RuntimeError(f"Invalid float value for env var {name}: {raw!r}") from exc
 
 
-def _env_int(name: str, *, default: int) -> int:
-    raw = os.getenv(name)
-    if raw is None or raw.strip() == "":
+def _env_int(name: str, *, default: int, source: Mapping[str, str] = os.environ) -> int:
+    raw = source.get(name)
+    # int()/float() accept surrounding whitespace, so no strip() copy is needed.
+    if not raw or raw.isspace():
         return default
     try:
         return int(raw)
@@ -73,17 +172,20 @@ def _env_int(name: str, *, default: int) -> int:
         raise RuntimeError(f"Invalid int value for env var {name}: {raw!r}") from exc
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class YtDlpConfig:
     ytdlp_js_runtime: Optional[str]
     ytdlp_remote_components: Optional[str]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LoggingConfig:
     log_level: str
 
 
+_LOG_LEVELS = frozenset({"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"})
+
+
 def load_logging_config(project_root: Path, *, load_env: bool = True) -> LoggingConfig:
     """Load logging-related settings.
 
@@ -92,13 +194,12 @@ def load_logging_config(project_root: Path, *, load_env: bool = True) -> Logging
     """
 
     if load_env:
-        load_dotenv(project_root / ".env")
+        _ensure_env_loaded(project_root)
 
-    raw = os.getenv("LOG_LEVEL", "INFO")
-    level = (raw or "INFO").strip().upper()
-    if not level:
-        level = "INFO"
-    return LoggingConfig(log_level=level)
+    raw = os.getenv("LOG_LEVEL") or "INFO"
+    if raw in _LOG_LEVELS:
+        return LoggingConfig(log_level=raw)
+    return LoggingConfig(log_level=raw.strip().upper() or "INFO")
 
 
 def load_ytdlp_config(project_root: Path, *, load_env: bool = True) -> YtDlpConfig:
@@ -109,14 +210,17 @@ def load_ytdlp_config(project_root: Path, *, load_env: bool = True) -> YtDlpConf
     """
 
     if load_env:
-        load_dotenv(project_root / ".env")
+        _ensure_env_loaded(project_root)
+    return _ytdlp_config_from(os.environ)
+
 
-    ytdlp_js_runtime_raw = os.getenv("YTDLP_JS_RUNTIME")
+def _ytdlp_config_from(source: Mapping[str, str]) -> YtDlpConfig:
+    ytdlp_js_runtime_raw = source.get("YTDLP_JS_RUNTIME")
     ytdlp_js_runtime = ytdlp_js_runtime_raw.strip() if ytdlp_js_runtime_raw else None
 
     # Important: if the variable is present but empty, keep it as "" to allow
     # explicit disabling (the downloader interprets empty as "disable").
-    ytdlp_remote_components_raw = os.getenv("YTDLP_REMOTE_COMPONENTS")
+    ytdlp_remote_components_raw = source.get("YTDLP_REMOTE_COMPONENTS")
     ytdlp_remote_components = (
         ytdlp_remote_components_raw.strip()
         if ytdlp_remote_components_raw is not None
@@ -129,7 +233,7 @@ def load_ytdlp_config(project_root: Path, *, load_env: bool = True) -> YtDlpConf
     )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Config:
     bot_token: str
     bot_api_base_url: str
@@ -147,6 +251,7 @@ class Config:
     progress_stall_interval_sec: float
     playlist_page_size: int
     selection_ttl_sec: float
+    worker_concurrency: int
 
     # yt-dlp advanced options (optional)
     # None means: use built-in defaults.
@@ -155,43 +260,84 @@ class Config:
     ytdlp_remote_components: Optional[str]
 
 
+# Every environment variable `Config` is built from.
+_CONFIG_ENV_KEYS = (
+    "BOT_TOKEN",
+    "BOT_API_BASE_URL",
+    "BOT_API_FILE_URL",
+    "BOT_LOCAL_MODE",
+    "BOT_API_LOCAL_PATH_FROM",
+    "BOT_API_LOCAL_PATH_TO",
+    "BOT_HTTP_CONNECT_TIMEOUT_SEC",
+    "BOT_HTTP_READ_TIMEOUT_SEC",
+    "BOT_HTTP_WRITE_TIMEOUT_SEC",
+    "BOT_HTTP_POOL_TIMEOUT_SEC",
+    "DOWNLOAD_ROOT",
+    "PROGRESS_MIN_INTERVAL_SEC",
+    "PROGRESS_STALL_INTERVAL_SEC",
+    "PLAYLIST_PAGE_SIZE",
+    "SELECTION_TTL_SEC",
+    "WORKER_CONCURRENCY",
+    "YTDLP_JS_RUNTIME",
+    "YTDLP_REMOTE_COMPONENTS",
+)
+
+
 def load_config(project_root: Path, *, load_env: bool = True) -> Config:
     if load_env:
-        load_dotenv(project_root / ".env")
+        _ensure_env_loaded(project_root)
 
-    ytdlp_cfg = load_ytdlp_config(project_root, load_env=False)
+    values = tuple(os.environ.get(name) for name in _CONFIG_ENV_KEYS)
+    # cwd is in the key because a relative DOWNLOAD_ROOT resolves against it.
+    return _build_config(project_root, _dotenv_mtime_ns(project_root / ".env"), os.getcwd(), values)
 
-    download_root = Path(_env("DOWNLOAD_ROOT", default=str(project_root / "downloads")))
 
-    local_from_raw = os.getenv("BOT_API_LOCAL_PATH_FROM")
-    local_to_raw = os.getenv("BOT_API_LOCAL_PATH_TO")
+@functools.lru_cache(maxsize=8)
+def _build_config(
+    project_root: Path,
+    dotenv_mtime_ns: Optional[int],
+    cwd: str,
+    values: tuple[Optional[str], ...],
+) -> Config:
+    """Build a `Config`; `Config` is frozen, so equal keys can share one instance.
 
-    local_from = Path(local_from_raw).expanduser().resolve() if local_from_raw else None
-    local_to = Path(local_to_raw) if local_to_raw else None
+    `dotenv_mtime_ns` and `cwd` are only part of the cache key.
+    """
+
+    _ = dotenv_mtime_ns, cwd
+    env = {name: value for name, value in zip(_CONFIG_ENV_KEYS, values) if value is not None}
+
+    ytdlp_cfg = _ytdlp_config_from(env)
+
+    download_root = _resolve_path(_env("DOWNLOAD_ROOT", default=str(project_root / "downloads"), source=env))
 
 
     return Config(
-        bot_token=_env("BOT_TOKEN"),
-        bot_api_base_url=_env("BOT_API_BASE_URL", default="https://api.telegram.org/bot"),
-        bot_api_file_url=_env("BOT_API_FILE_URL", default="https://api.telegram.org/file/bot"),
-        bot_local_mode=_env_bool("BOT_LOCAL_MODE", default=False),
-        bot_api_local_path_from=local_from,
-        bot_api_local_path_to=local_to,
+        bot_token=_env("BOT_TOKEN", source=env),
+        bot_api_base_url=_env("BOT_API_BASE_URL", default="https://api.telegram.org/bot", source=env),
+        bot_api_file_url=_env("BOT_API_FILE_URL", default="https://api.telegram.org/file/bot", source=env),
+        bot_local_mode=_env_bool("BOT_LOCAL_MODE", default=False, source=env),
+        bot_api_local_path_from=_opt_path("BOT_API_LOCAL_PATH_FROM", resolve=True, source=env),
+        # Path as seen by the Bot API server; it may not exist locally, so no resolve().
+        bot_api_local_path_to=_opt_path("BOT_API_LOCAL_PATH_TO", source=env),
 
         # Self-hosted Bot API server may take a long time to respond for sendDocument,
         # especially in --local mode when it uploads large files to Telegram DC.
-        bot_http_connect_timeout_sec=_env_float("BOT_HTTP_CONNECT_TIMEOUT_SEC", default=10.0),
-        bot_http_read_timeout_sec=_env_float("BOT_HTTP_READ_TIMEOUT_SEC", default=600.0),
-        bot_http_write_timeout_sec=_env_float("BOT_HTTP_WRITE_TIMEOUT_SEC", default=600.0),
-        bot_http_pool_timeout_sec=_env_float("BOT_HTTP_POOL_TIMEOUT_SEC", default=10.0),
+        bot_http_connect_timeout_sec=_env_float("BOT_HTTP_CONNECT_TIMEOUT_SEC", default=10.0, source=env),
+        bot_http_read_timeout_sec=_env_float("BOT_HTTP_READ_TIMEOUT_SEC", default=600.0, source=env),
+        bot_http_write_timeout_sec=_env_float("BOT_HTTP_WRITE_TIMEOUT_SEC", default=600.0, source=env),
+        bot_http_pool_timeout_sec=_env_float("BOT_HTTP_POOL_TIMEOUT_SEC", default=10.0, source=env),
 
-        download_root=download_root.expanduser().resolve(),
-        progress_min_interval_sec=_env_float("PROGRESS_MIN_INTERVAL_SEC", default=1.0),
-        progress_stall_interval_sec=_env_float("PROGRESS_STALL_INTERVAL_SEC", default=10.0),
-        playlist_page_size=_env_int("PLAYLIST_PAGE_SIZE", default=10),
+        download_root=download_root,
+        progress_min_interval_sec=_env_float("PROGRESS_MIN_INTERVAL_SEC", default=1.0, source=env),
+        progress_stall_interval_sec=_env_float("PROGRESS_STALL_INTERVAL_SEC", default=10.0, source=env),
+        playlist_page_size=_env_int("PLAYLIST_PAGE_SIZE", default=10, source=env),
 
         # Selection sessions are stored in memory; TTL prevents unbounded growth.
-        selection_ttl_sec=_env_float("SELECTION_TTL_SEC", default=24 * 60 * 60),
+        selection_ttl_sec=_env_float("SELECTION_TTL_SEC", default=24 * 60 * 60, source=env),
+
+        # Jobs from different chats run on separate workers; one chat's jobs stay in order.
+        worker_concurrency=_env_int("WORKER_CONCURRENCY", default=2, source=env),
 
         ytdlp_js_runtime=ytdlp_cfg.ytdlp_js_runtime,
         ytdlp_remote_components=ytdlp_cfg.ytdlp_remote_components,
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import sys
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Optional
+
+from app.downloader import ProgressCallback, download_urls
+
+logger = logging.getLogger(__name__)
+
+
+# Set in each worker process by `_init_worker`.
+_WORKER_PROGRESS: Optional[Any] = None
+
+
+def _init_worker(progress_queue: Any, log_level: int, log_format: str) -> None:
+    global _WORKER_PROGRESS
+    _WORKER_PROGRESS = progress_queue
+    logging.basicConfig(level=log_level, stream=sys.stdout, format=log_format)
+
+
+def _download_in_worker(job_id: str, kwargs: dict[str, Any]) -> list[Path]:
+    progress_queue = _WORKER_PROGRESS
+
+    def progress_cb(phase: str, percent: Optional[float]) -> None:
+        if progress_queue is not None:
+            progress_queue.put((job_id, phase, percent))
+
+    try:
+        return download_urls(progress_cb=progress_cb, **kwargs)
+    except Exception as exc:
+        # The exception is pickled back to the parent; yt-dlp's DownloadError
+        # holds a traceback and a local logger class, so it cannot be.
+        raise RuntimeError(str(exc)) from None
+
+
+class DownloadPool:
+    """Runs `download_urls` in worker processes.
+
+    yt-dlp extraction is Python code holding the GIL, so concurrent jobs in
+    threads serialize on it; separate processes do not. Progress callbacks are
+    sent back over a multiprocessing queue and dispatched by a relay thread.
+    """
+
+    def __init__(self, *, max_workers: int, log_level: int, log_format: str) -> None:
+        # spawn: forking a process that runs an event loop and threads is unsafe.
+        self._ctx = multiprocessing.get_context("spawn")
+        self._progress = self._ctx.Queue()
+        self._max_workers = max_workers
+        self._initargs = (self._progress, log_level, log_format)
+        self._executor = self._new_executor()
+        self._callbacks: dict[str, ProgressCallback] = {}
+        self._lock = threading.Lock()
+        self._relay_thread = threading.Thread(target=self._relay, name="download-progress-relay", daemon=True)
+        self._relay_thread.start()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            mp_context=self._ctx,
+            initializer=_init_worker,
+            initargs=self._initargs,
+        )
+
+    def _replace_broken(self, broken: ProcessPoolExecutor) -> None:
+        # Concurrent jobs on the same broken pool all land here; rebuild once.
+        with self._lock:
+            if self._executor is not broken:
+                return
+            logger.error("Download worker process died; restarting the process pool")
+            self._executor = self._new_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _relay(self) -> None:
+        while True:
+            item = self._progress.get()
+            if item is None:
+                return
+            job_id, phase, percent = item
+            with self._lock:
+                cb = self._callbacks.get(job_id)
+            if cb is None:
+                continue
+            try:
+                cb(phase, percent)
+            except Exception:
+                logger.debug("progress callback failed", exc_info=True)
+
+    async def run(self, *, progress_cb: Optional[ProgressCallback], **kwargs: Any) -> list[Path]:
+        """Await `download_urls(**kwargs)` in a worker process."""
+
+        job_id = uuid.uuid4().hex
+        if progress_cb is not None:
+            with self._lock:
+                self._callbacks[job_id] = progress_cb
+        executor = self._executor
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                executor,
+                functools.partial(_download_in_worker, job_id, kwargs),
+            )
+        except BrokenProcessPool:
+            # A worker was killed (OOM during a merge, a crash). This job fails,
+            # but later jobs get a fresh pool instead of failing immediately.
+            self._replace_broken(executor)
+            raise
+        finally:
+            with self._lock:
+                self._callbacks.pop(job_id, None)
+
+    def shutdown(self) -> None:
+        """Stop the pool, terminating downloads still running in workers.
+
+        Without terminating them, `shutdown(wait=False)` would leave running
+        children that hold up interpreter exit until they finish.
+        """
+
+        executor = self._executor
+        # No public API for this before Python 3.14 (`terminate_workers`).
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for proc in processes:
+            if proc.is_alive():
+                proc.terminate()
+        self._progress.put(None)
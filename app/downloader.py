@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+import atexit
 import contextlib
 import datetime as _dt
-import json
+import functools
+import heapq
 import logging
+import operator
+import os
 import shutil
 import subprocess
+import threading
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Callable, Dict, Iterable, Optional
@@ -23,6 +30,16 @@ from yt_dlp.utils import DownloadError
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=None)
+def _which(name: str) -> Optional[str]:
+    """Memoized `shutil.which`; PATH does not change during the life of the process.
+
+    Call `_which.cache_clear()` after changing PATH (e.g. in tests).
+    """
+
+    return shutil.which(name)
+
+
 def _js_runtimes(preferred: Optional[str]) -> Optional[dict[str, dict[str, Any]]]:
     """Return yt-dlp js_runtimes dict.
 
@@ -32,14 +49,14 @@ def _js_runtimes(preferred: Optional[str]) -> Optional[dict[str, dict[str, Any]]
 
     if preferred:
         preferred = preferred.strip().lower()
-        if shutil.which(preferred):
+        if _which(preferred):
             return {preferred: {}}
         # If user asked for it but it's missing, keep default behavior and let yt-dlp warn.
         return None
 
     runtimes: dict[str, dict[str, Any]] = {}
     for name in ("deno", "node"):
-        if shutil.which(name):
+        if _which(name):
             runtimes[name] = {}
 
     return runtimes or None
@@ -63,6 +80,15 @@ def _remote_components(raw: Optional[str]) -> Optional[set[str]]:
     return set(parts) if parts else None
 
 
+@functools.lru_cache(maxsize=4)
+def _advanced_options_cached(
+    js_runtime: Optional[str],
+    remote_raw: Optional[str],
+) -> tuple[Optional[dict[str, dict[str, Any]]], Optional[frozenset[str]]]:
+    remote = _remote_components(remote_raw)
+    return _js_runtimes(js_runtime), frozenset(remote) if remote is not None else None
+
+
 def ytdlp_advanced_options(
     *,
     ytdlp_js_runtime: Optional[str] = None,
@@ -70,9 +96,12 @@ def ytdlp_advanced_options(
 ) -> dict[str, Any]:
     js_runtime = ytdlp_js_runtime.strip().lower() if ytdlp_js_runtime else None
     remote_raw = ytdlp_remote_components.strip() if ytdlp_remote_components is not None else None
+    # Inputs come from env and rarely change; the result is memoized, and fresh
+    # copies are returned so callers may hand them to yt-dlp freely.
+    js_runtimes, remote = _advanced_options_cached(js_runtime, remote_raw)
     return {
-        "js_runtimes": _js_runtimes(js_runtime),
-        "remote_components": _remote_components(remote_raw),
+        "js_runtimes": {k: dict(v) for k, v in js_runtimes.items()} if js_runtimes is not None else None,
+        "remote_components": set(remote) if remote is not None else None,
     }
 
 
@@ -80,27 +109,39 @@ def _has_video_stream(file_path: Path, *, ffmpeg_path: str) -> bool:
     """Best-effort check that container has a video stream."""
 
     try:
-        proc = subprocess.run(
+        proc = subprocess.Popen(
             [
                 ffmpeg_path,
                 "-hide_banner",
                 "-i",
                 str(file_path),
             ],
-            stdout=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
             stderr=subprocess.PIPE,
             text=True,
-            check=False,
+            errors="replace",
         )
     except Exception:
         return True  # If we can't check, don't block sending.
 
-    text_out = (proc.stderr or "") + (proc.stdout or "")
-    return "Video:" in text_out
+    # Stream info goes to stderr; stop reading at the first video stream.
+    try:
+        for line in proc.stderr or ():
+            if "Video:" in line:
+                proc.kill()
+                return True
+        return False
+    except Exception:
+        return True
+    finally:
+        if proc.stderr is not None:
+            proc.stderr.close()
+        proc.wait()
 
 
-def _find_ffprobe() -> Optional[str]:
-    return shutil.which("ffprobe")
+@functools.lru_cache(maxsize=1)
+def find_ffprobe() -> Optional[str]:
+    return _which("ffprobe")
 
 
 def _probe_streams(
@@ -108,88 +149,130 @@ def _probe_streams(
     *,
     ffprobe_path: Optional[str],
     ffmpeg_path: str,
+) -> dict[str, Optional[str] | bool]:
+    """Cached `_probe_streams_uncached`, keyed by path plus size/mtime."""
+
+    try:
+        st = file_path.stat()
+    except OSError:
+        return _probe_streams_uncached(file_path, ffprobe_path=ffprobe_path, ffmpeg_path=ffmpeg_path)
+    info = _probe_streams_cached(str(file_path), st.st_size, st.st_mtime_ns, ffprobe_path, ffmpeg_path)
+    return dict(info)
+
+
+@functools.lru_cache(maxsize=256)
+def _probe_streams_cached(
+    path_str: str,
+    size: int,
+    mtime_ns: int,
+    ffprobe_path: Optional[str],
+    ffmpeg_path: str,
+) -> dict[str, Optional[str] | bool]:
+    # size/mtime_ns only make the key change when the file does.
+    _ = (size, mtime_ns)
+    return _probe_streams_uncached(Path(path_str), ffprobe_path=ffprobe_path, ffmpeg_path=ffmpeg_path)
+
+
+def _probe_streams_uncached(
+    file_path: Path,
+    *,
+    ffprobe_path: Optional[str],
+    ffmpeg_path: str,
 ) -> dict[str, Optional[str] | bool]:
     """Return best-effort stream info.
 
     Keys: has_video, has_audio, vcodec, acodec, sar, dar, rotate
+
+    ffprobe output is authoritative; the ffmpeg banner check is only used when
+    ffprobe is not installed at all.
     """
 
-    if ffprobe_path:
-        try:
-            proc = subprocess.run(
-                [
-                    ffprobe_path,
-                    "-v",
-                    "error",
-                    "-show_streams",
-                    "-of",
-                    "json",
-                    str(file_path),
-                ],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=False,
-            )
-            data = json.loads(proc.stdout or "{}")
-            streams = data.get("streams") or []
-            vcodec: Optional[str] = None
-            acodec: Optional[str] = None
-            sar: Optional[str] = None
-            dar: Optional[str] = None
-            rotate: Optional[str] = None
-            has_video = False
-            has_audio = False
-            for s in streams:
-                if not isinstance(s, dict):
-                    continue
-                codec_type = s.get("codec_type")
-                codec_name = s.get("codec_name")
-                if codec_type == "video" and isinstance(codec_name, str) and codec_name:
-                    has_video = True
-                    if vcodec is None:
-                        vcodec = codec_name.lower()
-                    if sar is None:
-                        sample_aspect_ratio = s.get("sample_aspect_ratio")
-                        if isinstance(sample_aspect_ratio, str) and sample_aspect_ratio:
-                            sar = sample_aspect_ratio
-                    if dar is None:
-                        display_aspect_ratio = s.get("display_aspect_ratio")
-                        if isinstance(display_aspect_ratio, str) and display_aspect_ratio:
-                            dar = display_aspect_ratio
-                    if rotate is None:
-                        tags = s.get("tags")
-                        if isinstance(tags, dict):
-                            r = tags.get("rotate")
-                            if isinstance(r, str) and r:
-                                rotate = r
-                if codec_type == "audio" and isinstance(codec_name, str) and codec_name:
-                    has_audio = True
-                    if acodec is None:
-                        acodec = codec_name.lower()
-
-            return {
-                "has_video": has_video,
-                "has_audio": has_audio,
-                "vcodec": vcodec,
-                "acodec": acodec,
-                "sar": sar,
-                "dar": dar,
-                "rotate": rotate,
-            }
-        except Exception:
-            logger.debug("ffprobe stream probe failed for %s", file_path, exc_info=True)
+    if not ffprobe_path:
+        has_video = _has_video_stream(file_path, ffmpeg_path=ffmpeg_path)
+        return {
+            "has_video": has_video,
+            "has_audio": None,
+            "vcodec": None,
+            "acodec": None,
+            "sar": None,
+            "dar": None,
+            "rotate": None,
+        }
+
+    try:
+        proc = subprocess.run(
+            [
+                ffprobe_path,
+                "-v",
+                "error",
+                "-show_entries",
+                "stream=codec_type,codec_name,sample_aspect_ratio,display_aspect_ratio:stream_tags=rotate",
+                "-of",
+                "default",
+                str(file_path),
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=False,
+        )
+        out = proc.stdout or ""
+    except Exception:
+        logger.debug("ffprobe stream probe failed for %s", file_path, exc_info=True)
+        # If we can't check, don't touch the file (same as `_has_video_stream`).
+        return {
+            "has_video": True,
+            "has_audio": None,
+            "vcodec": None,
+            "acodec": None,
+            "sar": None,
+            "dar": None,
+            "rotate": None,
+        }
+
+    # Default writer: one "key=value" per line, each stream wrapped in
+    # [STREAM]...[/STREAM]; tags come as "TAG:rotate=90", missing values as "N/A".
+    vcodec: Optional[str] = None
+    acodec: Optional[str] = None
+    sar: Optional[str] = None
+    dar: Optional[str] = None
+    rotate: Optional[str] = None
+    has_video = False
+    has_audio = False
+    fields: dict[str, str] = {}
+    for line in out.splitlines():
+        if line != "[/STREAM]":
+            key, sep, value = line.partition("=")
+            if sep and value and value != "N/A":
+                fields[key] = value
+            continue
+
+        codec_type = fields.get("codec_type")
+        codec_name = fields.get("codec_name")
+        if codec_name and codec_type == "video":
+            has_video = True
+            if vcodec is None:
+                vcodec = codec_name.lower()
+            if sar is None:
+                sar = fields.get("sample_aspect_ratio")
+            if dar is None:
+                dar = fields.get("display_aspect_ratio")
+            if rotate is None:
+                rotate = fields.get("TAG:rotate")
+        elif codec_name and codec_type == "audio":
+            has_audio = True
+            if acodec is None:
+                acodec = codec_name.lower()
+        fields = {}
 
-    # Fallback: only presence check.
-    has_video = _has_video_stream(file_path, ffmpeg_path=ffmpeg_path)
     return {
         "has_video": has_video,
-        "has_audio": None,
-        "vcodec": None,
-        "acodec": None,
-        "sar": None,
-        "dar": None,
-        "rotate": None,
+        "has_audio": has_audio,
+        "vcodec": vcodec,
+        "acodec": acodec,
+        "sar": sar,
+        "dar": dar,
+        "rotate": rotate,
     }
 
 
@@ -217,40 +300,97 @@ def _fix_h264_sar_to_1_1(input_path: Path, *, ffmpeg_path: str) -> Path:
         "+faststart",
         str(out_path),
     ]
-    subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
     return out_path
 
 
+# Per-process ffmpeg thread cap; post-processing runs several ffmpegs in parallel.
+_FFMPEG_THREADS = 4
+
+
+# Hardware H.264 encoders in order of preference, with rate-control args roughly
+# matching libx264 CRF 23. VAAPI is left out: it needs a device and hwupload filter.
+_H264_ENCODER_ARGS: dict[str, list[str]] = {
+    "h264_nvenc": ["-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "0"],
+    "h264_videotoolbox": ["-b:v", "4M", "-allow_sw", "1"],
+    "h264_qsv": ["-global_quality", "23"],
+    "libx264": ["-preset", "veryfast", "-crf", "23"],
+}
+
+_ENCODER: Optional[str] = None
+
+
+def _pick_h264_encoder(ffmpeg_path: str) -> str:
+    """Return the preferred H.264 encoder compiled into ffmpeg (memoized)."""
+
+    global _ENCODER
+    if _ENCODER is not None:
+        return _ENCODER
+
+    encoder = "libx264"
+    try:
+        proc = subprocess.run(
+            [ffmpeg_path, "-hide_banner", "-encoders"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=False,
+        )
+        available = {parts[1] for parts in (line.split() for line in proc.stdout.splitlines()) if len(parts) >= 2}
+        for name in _H264_ENCODER_ARGS:
+            if name in available:
+                encoder = name
+                break
+    except Exception:
+        logger.debug("ffmpeg encoder probe failed", exc_info=True)
+
+    logger.info("H.264 encoder for transcodes: %s", encoder)
+    _ENCODER = encoder
+    return encoder
+
+
 def _transcode_to_telegram_mp4(input_path: Path, *, ffmpeg_path: str) -> Path:
+    global _ENCODER
+
     out_path = input_path.with_name(f"{input_path.stem} [tg].mp4")
+    encoder = _pick_h264_encoder(ffmpeg_path)
+
+    def _cmd(enc: str) -> list[str]:
+        return [
+            ffmpeg_path,
+            "-y",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-i",
+            str(input_path),
+            "-threads",
+            str(_FFMPEG_THREADS),
+            "-vf",
+            "scale=trunc(iw/2)*2:trunc(ih/2)*2,setsar=1",
+            "-c:v",
+            enc,
+            *_H264_ENCODER_ARGS[enc],
+            "-pix_fmt",
+            "yuv420p",
+            "-c:a",
+            "aac",
+            "-b:a",
+            "128k",
+            "-movflags",
+            "+faststart",
+            str(out_path),
+        ]
 
-    cmd = [
-        ffmpeg_path,
-        "-y",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-i",
-        str(input_path),
-        "-vf",
-        "scale=trunc(iw/2)*2:trunc(ih/2)*2,setsar=1",
-        "-c:v",
-        "libx264",
-        "-preset",
-        "veryfast",
-        "-crf",
-        "23",
-        "-pix_fmt",
-        "yuv420p",
-        "-c:a",
-        "aac",
-        "-b:a",
-        "128k",
-        "-movflags",
-        "+faststart",
-        str(out_path),
-    ]
-    subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    try:
+        subprocess.run(_cmd(encoder), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+    except subprocess.CalledProcessError:
+        if encoder == "libx264":
+            raise
+        # Encoder is compiled in but the hardware/driver is missing: stick to libx264.
+        logger.warning("Hardware encoder %s failed, falling back to libx264", encoder, exc_info=True)
+        _ENCODER = "libx264"
+        subprocess.run(_cmd("libx264"), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
     return out_path
 
 
@@ -264,6 +404,8 @@ def _extract_audio_m4a(input_path: Path, *, ffmpeg_path: str) -> Path:
         "error",
         "-i",
         str(input_path),
+        "-threads",
+        str(_FFMPEG_THREADS),
         "-vn",
         "-c:a",
         "aac",
@@ -271,10 +413,34 @@ def _extract_audio_m4a(input_path: Path, *, ffmpeg_path: str) -> Path:
         "128k",
         str(out_path),
     ]
-    subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
     return out_path
 
 
+def _finalize_for_telegram(
+    input_path: Path,
+    *,
+    needs_transcode: bool,
+    needs_sar_fix: bool,
+    extract_audio: bool,
+    ffmpeg_path: str,
+) -> Optional[Path]:
+    """Make `input_path` Telegram-friendly with a single ffmpeg pass.
+
+    The fixups never have to be chained: audio extraction drops the video, and
+    the transcode already applies setsar=1, which covers a SAR fix.
+    Returns the produced file, or None if nothing had to be done.
+    """
+
+    if extract_audio:
+        return _extract_audio_m4a(input_path, ffmpeg_path=ffmpeg_path)
+    if needs_transcode:
+        return _transcode_to_telegram_mp4(input_path, ffmpeg_path=ffmpeg_path)
+    if needs_sar_fix:
+        return _fix_h264_sar_to_1_1(input_path, ffmpeg_path=ffmpeg_path)
+    return None
+
+
 class YtDlpLogger:
     def debug(self, msg: str) -> None:
         logger.debug("yt-dlp: %s", msg)
@@ -286,8 +452,84 @@ class YtDlpLogger:
         logger.error("yt-dlp: %s", msg)
 
 
+_YTDLP_LOGGER = YtDlpLogger()
+
+
+def _freeze(value: Any) -> Any:
+    """Turn nested option values (dicts, lists, sets) into a hashable form."""
+
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_freeze(v) for v in value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+# Long-lived YoutubeDL instances for option sets that do not change between calls
+# (probing). Constructing one loads every extractor and parses the options.
+# YoutubeDL is not thread-safe and probes run in worker threads, so each thread
+# keeps its own instances.
+_YDL_LOCAL = threading.local()
+_YDL_ALL: list[YoutubeDL] = []
+_YDL_ALL_LOCK = threading.Lock()
+
+
+def _cached_ydl(opts: Dict[str, Any]) -> YoutubeDL:
+    cache: Optional[dict[tuple[Any, ...], YoutubeDL]] = getattr(_YDL_LOCAL, "cache", None)
+    if cache is None:
+        cache = _YDL_LOCAL.cache = {}
+    key = _freeze(opts)
+    ydl = cache.get(key)
+    if ydl is None:
+        ydl = YoutubeDL(opts).__enter__()
+        cache[key] = ydl
+        with _YDL_ALL_LOCK:
+            _YDL_ALL.append(ydl)
+    return ydl
+
+
+@atexit.register
+def _close_cached_ydls() -> None:
+    with _YDL_ALL_LOCK:
+        ydls = list(_YDL_ALL)
+        _YDL_ALL.clear()
+    for ydl in ydls:
+        with contextlib.suppress(Exception):
+            ydl.close()
+
+
+# yt-dlp format selectors keyed on (telegram_compatibility, height-limited);
+# "{h}" is the height cap.
+_FORMAT_SELECTORS: dict[tuple[bool, bool], str] = {
+    # Prefer Telegram-playable codecs: H.264 (avc1) + AAC (m4a).
+    # Fallbacks:
+    # - If no compatible video formats exist, try other video+audio.
+    # - If the source only provides audio, allow audio-only (bestaudio).
+    (True, True): (
+        "bv*[height<={h}][vcodec^=avc1]+ba[ext=m4a]/"
+        "bv*[height<={h}][vcodec!=none]+ba/"
+        "best[height<={h}][vcodec!=none]/"
+        "best[vcodec!=none]/"
+        "bestaudio/best"
+    ),
+    (True, False): "bv*[vcodec^=avc1]+ba[ext=m4a]/bv*[vcodec!=none]+ba/best[vcodec!=none]/bestaudio/best",
+    # CLI-style selector: best video+audio, optionally capped by height.
+    (False, True): "bv*[height<={h}]+ba/b[height<={h}]/best",
+    (False, False): "bv*+ba/best",
+}
+
+
+@functools.lru_cache(maxsize=1)
 def find_ffmpeg() -> Optional[str]:
-    system = shutil.which("ffmpeg")
+    """Locate ffmpeg on PATH, falling back to the imageio-ffmpeg binary.
+
+    Resolved once per process; call `find_ffmpeg.cache_clear()` (and
+    `_which.cache_clear()`) after changing PATH.
+    """
+
+    system = _which("ffmpeg")
     if system:
         return system
     if imageio_ffmpeg is not None:
@@ -351,7 +593,9 @@ def entry_to_url(entry: Dict[str, Any]) -> Optional[str]:
     return url
 
 
-def available_heights(info: Dict[str, Any]) -> list[int]:
+def available_heights(info: Dict[str, Any], *, limit: Optional[int] = None) -> list[int]:
+    """Distinct video heights, highest first; only the top `limit` if given."""
+
     formats = info.get("formats") or []
     heights: set[int] = set()
     for fmt in formats:
@@ -361,6 +605,8 @@ def available_heights(info: Dict[str, Any]) -> list[int]:
         vcodec = fmt.get("vcodec")
         if isinstance(height, int) and height > 0 and vcodec and vcodec != "none":
             heights.add(height)
+    if limit is not None:
+        return heapq.nlargest(limit, heights)
     return sorted(heights, reverse=True)
 
 
@@ -388,26 +634,33 @@ def probe_url(
         js_runtimes = advanced["js_runtimes"]
         remote_components = advanced["remote_components"]
 
-        # 1) Lightweight playlist probe
-        with YoutubeDL(
+        # 1) Main probe. "in_playlist" keeps playlist entries flat (cheap), while a
+        # single video is fully extracted, so its formats are available right away.
+        ydl = _cached_ydl(
             {
                 "quiet": True,
                 "no_warnings": True,
-                "logger": YtDlpLogger(),
+                "logger": _YTDLP_LOGGER,
                 "ffmpeg_location": ffmpeg_path,
                 "js_runtimes": js_runtimes,
                 "remote_components": remote_components,
-                "extract_flat": True,
+                "extract_flat": "in_playlist",
                 "skip_download": True,
                 "noplaylist": False,
             }
-        ) as ydl:
-            info = ydl.extract_info(url, download=False)
+        )
+        info = ydl.extract_info(url, download=False)
+
+        is_playlist = isinstance(info, dict) and info.get("_type") == "playlist"
 
         playlist_entries: list[PlaylistEntry] = []
-        if isinstance(info, dict) and info.get("_type") == "playlist":
-            entries = [e for e in (info.get("entries") or []) if isinstance(e, dict)]
-            for idx, entry in enumerate(entries, start=1):
+        if is_playlist:
+            # Single pass over the (possibly lazy) entries; `idx` counts dict entries only.
+            idx = 0
+            for entry in info.get("entries") or ():
+                if not isinstance(entry, dict):
+                    continue
+                idx += 1
                 entry_url = entry_to_url(entry)
                 if not entry_url:
                     continue
@@ -420,20 +673,23 @@ def probe_url(
                     PlaylistEntry(index=idx, title=title.strip(), url=entry_url, duration_sec=duration_sec)
                 )
 
-        # 2) Quality probe for the *main* URL (or first entry)
-        quality_target = playlist_entries[0].url if playlist_entries else url
-        with YoutubeDL(
-            {
-                "quiet": True,
-                "no_warnings": True,
-                "logger": YtDlpLogger(),
-                "ffmpeg_location": ffmpeg_path,
-                "js_runtimes": js_runtimes,
-                "remote_components": remote_components,
-                "noplaylist": True,
-            }
-        ) as ydl:
+        # 2) Quality probe: only playlists need a second extraction (of the first entry).
+        if is_playlist:
+            quality_target = playlist_entries[0].url if playlist_entries else url
+            ydl = _cached_ydl(
+                {
+                    "quiet": True,
+                    "no_warnings": True,
+                    "logger": _YTDLP_LOGGER,
+                    "ffmpeg_location": ffmpeg_path,
+                    "js_runtimes": js_runtimes,
+                    "remote_components": remote_components,
+                    "noplaylist": True,
+                }
+            )
             info2 = ydl.extract_info(quality_target, download=False)
+        else:
+            info2 = info
 
         heights = available_heights(info2 if isinstance(info2, dict) else {})
 
@@ -446,6 +702,9 @@ def probe_url(
         return ProbeResult(False, str(exc).strip() or repr(exc), [], [])
 
 
+# Minimum spacing between forwarded download-percent callbacks (100% always passes).
+_PROGRESS_EMIT_INTERVAL_SEC = 0.2
+
 ProgressCallback = Callable[[str, Optional[float]], None]
 RawProgressHook = Callable[[Dict[str, Any]], None]
 
@@ -460,16 +719,24 @@ def download_urls(
     ytdlp_js_runtime: Optional[str] = None,
     ytdlp_remote_components: Optional[str] = None,
     raw_progress_hook: Optional[RawProgressHook] = None,
+    raw_postprocessor_hook: Optional[RawProgressHook] = None,
     telegram_compatibility: bool = True,
     allow_playlist: bool = False,
+    concurrent_fragment_downloads: Optional[int] = None,
 ) -> list[Path]:
-    """Blocking download. Returns list of produced media files."""
+    """Blocking download. Returns list of produced media files.
+
+    `raw_progress_hook` / `raw_postprocessor_hook` receive yt-dlp's raw
+    progress and postprocessor hook dicts (used by the CLI).
+    `concurrent_fragment_downloads` is yt-dlp's `-N`: fragments of HLS/DASH
+    formats fetched in parallel (yt-dlp default: 1).
+    """
 
     ffmpeg_path = find_ffmpeg()
     if not ffmpeg_path:
         raise RuntimeError("ffmpeg not found")
 
-    ffprobe_path = _find_ffprobe()
+    ffprobe_path = find_ffprobe()
 
     urls = list(urls)
 
@@ -496,39 +763,41 @@ def download_urls(
 
     outtmpl = str(output_dir / "%(title).200s [%(id)s].%(ext)s")
 
-    if telegram_compatibility:
-        # Prefer Telegram-playable codecs: H.264 (avc1) + AAC (m4a).
-        # Fallbacks:
-        # - If no compatible video formats exist, try other video+audio.
-        # - If the source only provides audio, allow audio-only (bestaudio).
-        if max_height:
-            format_selector = (
-                f"bv*[height<={max_height}][vcodec^=avc1]+ba[ext=m4a]/"
-                f"bv*[height<={max_height}][vcodec!=none]+ba/"
-                f"best[height<={max_height}][vcodec!=none]/"
-                f"best[vcodec!=none]/"
-                f"bestaudio/best"
-            )
-        else:
-            format_selector = "bv*[vcodec^=avc1]+ba[ext=m4a]/bv*[vcodec!=none]+ba/best[vcodec!=none]/bestaudio/best"
-    else:
-        # CLI-style selector: best video+audio, optionally capped by height.
-        if max_height:
-            format_selector = f"bv*[height<={max_height}]+ba/b[height<={max_height}]/best"
-        else:
-            format_selector = "bv*+ba/best"
+    format_selector = _FORMAT_SELECTORS[(telegram_compatibility, bool(max_height))].format(h=max_height or 0)
 
     last_percent = {"v": -1}
+    last_emit_t = {"v": 0.0}
     processing_announced = {"v": False}
-    file_downloaded: dict[str, float] = {}
-    file_total: dict[str, float] = {}
+    processing_lock = threading.Lock()
+    # Per-file (downloaded, total) plus running sums over files with a known total,
+    # so a progress tick updates the aggregate without iterating every file.
+    file_progress: dict[str, tuple[float, float]] = {}
+    sums = {"done": 0.0, "total": 0.0}
+
+    def _update_file(key: str, downloaded: Optional[float], total: Optional[float]) -> None:
+        prev_done, prev_total = file_progress.get(key, (0.0, 0.0))
+        done = prev_done if downloaded is None else downloaded
+        total = prev_total if total is None else total
+        file_progress[key] = (done, total)
+        if prev_total > 0:
+            sums["done"] -= min(prev_done, prev_total)
+            sums["total"] -= prev_total
+        if total > 0:
+            sums["done"] += min(done, total)
+            sums["total"] += total
+        # Guard against float drift from the repeated subtract/add.
+        if sums["done"] < 1e-6:
+            sums["done"] = 0.0
+        if sums["total"] < 1e-6:
+            sums["total"] = 0.0
 
     def _emit_processing() -> None:
         if progress_cb is None:
             return
-        if processing_announced["v"]:
-            return
-        processing_announced["v"] = True
+        with processing_lock:
+            if processing_announced["v"]:
+                return
+            processing_announced["v"] = True
         progress_cb("processing", None)
 
     def _emit_download_percent(p: float) -> None:
@@ -537,7 +806,11 @@ def download_urls(
         pi = int(max(0.0, min(100.0, p)))
         if pi == last_percent["v"]:
             return
+        now = time.monotonic()
+        if pi != 100 and now - last_emit_t["v"] < _PROGRESS_EMIT_INTERVAL_SEC:
+            return
         last_percent["v"] = pi
+        last_emit_t["v"] = now
         progress_cb("download", float(pi))
 
     def hook(progress: Dict[str, Any]) -> None:
@@ -560,8 +833,7 @@ def download_urls(
             # Mark this file as fully downloaded so aggregate percent reaches 100.
             total = progress.get("total_bytes") or progress.get("total_bytes_estimate")
             if isinstance(total, (int, float)) and total > 0:
-                file_total[key] = float(total)
-                file_downloaded[key] = float(total)
+                _update_file(key, float(total), float(total))
             # Don't force 100% here; aggregate will update on subsequent events.
             return
 
@@ -570,30 +842,19 @@ def download_urls(
 
         downloaded = progress.get("downloaded_bytes")
         total = progress.get("total_bytes") or progress.get("total_bytes_estimate")
-        if isinstance(downloaded, (int, float)) and downloaded >= 0:
-            file_downloaded[key] = float(downloaded)
-        if isinstance(total, (int, float)) and total > 0:
-            file_total[key] = float(total)
+        _update_file(
+            key,
+            float(downloaded) if isinstance(downloaded, (int, float)) and downloaded >= 0 else None,
+            float(total) if isinstance(total, (int, float)) and total > 0 else None,
+        )
 
         # Aggregate across multiple downloads (video+audio) so percent doesn't reset.
-        totals = [t for t in file_total.values() if t > 0]
-        if totals:
-            sum_total = float(sum(totals))
-            sum_done = 0.0
-            for k, t in file_total.items():
-                if t <= 0:
-                    continue
-                d = file_downloaded.get(k, 0.0)
-                if d < 0:
-                    d = 0.0
-                if d > t:
-                    d = t
-                sum_done += d
-
-            _emit_download_percent(100.0 * sum_done / sum_total)
+        if sums["total"] > 0:
+            _emit_download_percent(100.0 * sums["done"] / sums["total"])
             return
 
-        # Fallback if totals are unknown: keep the old behavior, but never reset backwards.
+        # Fallback if totals are unknown (no file has reported a size yet): parse the
+        # display string, but never reset backwards.
         percent_str = progress.get("_percent_str")
         if isinstance(percent_str, str):
             try:
@@ -622,6 +883,12 @@ def download_urls(
         "noplaylist": (playlist_items is None) and (not allow_playlist),
     }
 
+    if raw_postprocessor_hook is not None:
+        ydl_opts["postprocessor_hooks"] = [raw_postprocessor_hook]
+
+    if concurrent_fragment_downloads is not None:
+        ydl_opts["concurrent_fragment_downloads"] = concurrent_fragment_downloads
+
     if playlist_items is not None:
         # Restrict playlist download to a specific item. yt-dlp expects a string like "3".
         ydl_opts["playlist_items"] = str(playlist_items)
@@ -658,65 +925,78 @@ def download_urls(
         # Some sources (e.g. Instagram) can return HEVC/VP9 which plays as 'audio only'
         # on some clients. Also, some downloads may end up as audio-only in an mp4.
         video_exts = {".mp4", ".mkv", ".webm"}
-        fixed_any = False
-        for p in list(files):
-            if p.suffix.lower() not in video_exts:
-                continue
 
-            info = _probe_streams(p, ffprobe_path=ffprobe_path, ffmpeg_path=ffmpeg_path)
+        # Decide every file's fixups first, then run one ffmpeg pass per file.
+        video_files = [p for p in files if p.suffix.lower() in video_exts]
+
+        def _probe(p: Path) -> dict[str, Optional[str] | bool]:
+            return _probe_streams(p, ffprobe_path=ffprobe_path, ffmpeg_path=ffmpeg_path)
+
+        # Probes are independent subprocess calls; run them side by side.
+        if len(video_files) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(video_files))) as pool:
+                probes = list(pool.map(_probe, video_files))
+        else:
+            probes = [_probe(p) for p in video_files]
+
+        plans: list[tuple[Path, bool, bool, bool]] = []
+        for p, info in zip(video_files, probes):
             has_video = bool(info.get("has_video"))
             has_audio = bool(info.get("has_audio")) if info.get("has_audio") is not None else True
             vcodec = info.get("vcodec")
             sar = info.get("sar")
 
-            if not has_video and has_audio:
-                logger.warning("No video stream detected, extracting audio: %s", p.name)
-                fixed_any = True
-                _emit_processing()
-                try:
-                    out_audio = _extract_audio_m4a(p, ffmpeg_path=ffmpeg_path)
-                    with contextlib.suppress(Exception):
-                        p.unlink(missing_ok=True)
-                    files.append(out_audio)
-                except Exception:
-                    # Keep original if extraction failed.
-                    pass
-                continue
-
-            if has_video and isinstance(vcodec, str) and vcodec and vcodec != "h264":
-                logger.warning("Non-H.264 video codec detected (%s), transcoding: %s", vcodec, p.name)
-                fixed_any = True
-                _emit_processing()
-                try:
-                    out_mp4 = _transcode_to_telegram_mp4(p, ffmpeg_path=ffmpeg_path)
-                    with contextlib.suppress(Exception):
-                        p.unlink(missing_ok=True)
-                    files.append(out_mp4)
-                except Exception:
-                    # Keep original if transcode failed.
-                    pass
-
+            extract_audio = not has_video and has_audio
+            needs_transcode = (
+                not extract_audio and has_video and isinstance(vcodec, str) and bool(vcodec) and vcodec != "h264"
+            )
             # Telegram sometimes renders a square if SAR is strange (e.g. 16:9 on a 9:16 frame).
             # If we can detect it, fix it without re-encoding.
-            if (
-                has_video
-                and isinstance(vcodec, str)
+            needs_sar_fix = (
+                not extract_audio
+                and has_video
                 and vcodec == "h264"
                 and isinstance(sar, str)
-                and sar
+                and bool(sar)
                 and sar != "1:1"
-            ):
+            )
+
+            if extract_audio:
+                logger.warning("No video stream detected, extracting audio: %s", p.name)
+            elif needs_transcode:
+                logger.warning("Non-H.264 video codec detected (%s), transcoding: %s", vcodec, p.name)
+            elif needs_sar_fix:
                 logger.warning("Non-1:1 SAR detected (%s), fixing metadata: %s", sar, p.name)
-                fixed_any = True
-                _emit_processing()
-                try:
-                    out_fixed = _fix_h264_sar_to_1_1(p, ffmpeg_path=ffmpeg_path)
-                    with contextlib.suppress(Exception):
-                        p.unlink(missing_ok=True)
-                    files.append(out_fixed)
-                except Exception:
-                    # Keep original if fix failed.
-                    pass
+            else:
+                continue
+            plans.append((p, needs_transcode, needs_sar_fix, extract_audio))
+
+        def _postprocess_one(plan: tuple[Path, bool, bool, bool]) -> None:
+            p, needs_transcode, needs_sar_fix, extract_audio = plan
+            _emit_processing()
+            try:
+                out = _finalize_for_telegram(
+                    p,
+                    needs_transcode=needs_transcode,
+                    needs_sar_fix=needs_sar_fix,
+                    extract_audio=extract_audio,
+                    ffmpeg_path=ffmpeg_path,
+                )
+            except Exception:
+                # Keep original if the fix failed.
+                return
+            if out is not None:
+                with contextlib.suppress(Exception):
+                    p.unlink(missing_ok=True)
+
+        fixed_any = bool(plans)
+        if len(plans) == 1:
+            _postprocess_one(plans[0])
+        elif plans:
+            # Each ffmpeg is capped at _FFMPEG_THREADS, so run several side by side.
+            max_workers = min(len(plans), max(1, (os.cpu_count() or 1) // _FFMPEG_THREADS))
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                list(pool.map(_postprocess_one, plans))
 
         if fixed_any:
             # Refresh list, prefer newly produced files.
@@ -729,16 +1009,20 @@ _MEDIA_EXTS = {".mp4", ".mkv", ".webm", ".mp3", ".m4a", ".aac", ".wav", ".flac",
 
 
 def _collect_media_files(folder: Path) -> list[Path]:
-    files: list[Path] = []
-    for p in folder.iterdir():
-        if not p.is_file():
-            continue
-        if p.suffix.lower() not in _MEDIA_EXTS:
-            continue
-        if p.name.endswith(".part"):
-            continue
-        files.append(p)
+    # os.scandir: one stat per file (DirEntry caches it), none for skipped names.
+    found: list[tuple[float, int, str]] = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            name = entry.name
+            if name.endswith(".part"):
+                continue
+            if os.path.splitext(name)[1].lower() not in _MEDIA_EXTS:
+                continue
+            if not entry.is_file():
+                continue
+            st = entry.stat()
+            found.append((st.st_mtime, st.st_size, entry.path))
 
     # Prefer newest first; if equal, prefer larger.
-    files.sort(key=lambda x: (x.stat().st_mtime, x.stat().st_size), reverse=True)
-    return files
+    found.sort(key=operator.itemgetter(0, 1), reverse=True)
+    return [Path(path) for _, _, path in found]
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import asyncio
+from collections import deque
 from dataclasses import dataclass
-from typing import Optional
+from typing import Container, Optional
 
 
 @dataclass(frozen=True)
@@ -17,8 +18,10 @@ class DownloadJob:
 
 class DownloadQueue:
     def __init__(self) -> None:
-        self._items: list[DownloadJob] = []
+        self._items: deque[DownloadJob] = deque()
         self._cond = asyncio.Condition()
+        # Queue position last shown to the user, per (chat_id, progress_message_id).
+        self.shown_positions: dict[tuple[int, int], int] = {}
 
     def qsize(self) -> int:
         return len(self._items)
@@ -28,14 +31,29 @@ class DownloadQueue:
         async with self._cond:
             self._items.append(job)
             pos = len(self._items)
+            self.shown_positions[(job.chat_id, job.progress_message_id)] = pos
             self._cond.notify(1)
             return pos
 
-    async def get(self) -> DownloadJob:
+    async def get(self, *, skip_chats: Container[int] = ()) -> DownloadJob:
+        """Take the oldest job whose chat is not in `skip_chats`.
+
+        Waits until such a job is enqueued, or `wake()` signals that the
+        skipped set may have changed.
+        """
         async with self._cond:
-            while not self._items:
+            while True:
+                for i, job in enumerate(self._items):
+                    if job.chat_id not in skip_chats:
+                        del self._items[i]
+                        self.shown_positions.pop((job.chat_id, job.progress_message_id), None)
+                        return job
                 await self._cond.wait()
-            return self._items.pop(0)
+
+    async def wake(self) -> None:
+        """Let waiting `get()` calls re-check their skip set."""
+        async with self._cond:
+            self._cond.notify_all()
 
     async def snapshot(self) -> list[DownloadJob]:
         """Return a stable snapshot of currently waiting jobs."""
@@ -1,14 +1,25 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
 
 from app.config import Config
 from app.queue import DownloadQueue
 from app.state import InMemoryState
 
+if TYPE_CHECKING:
+    from app.download_pool import DownloadPool
+
 
 @dataclass(frozen=True)
 class Services:
     config: Config
     queue: DownloadQueue
     state: InMemoryState
+
+    # Resolved once at startup; None when the tool is not available.
+    ffmpeg_path: Optional[str] = None
+    ffprobe_path: Optional[str] = None
+
+    # Worker processes for download_urls; None runs downloads in threads.
+    download_pool: Optional[DownloadPool] = None
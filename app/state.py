@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
+import logging
 import secrets
 from dataclasses import dataclass
 from dataclasses import field
@@ -8,6 +11,8 @@ from typing import Optional
 
 from .downloader import PlaylistEntry
 
+logger = logging.getLogger(__name__)
+
 
 def new_token() -> str:
     # callback_data must be <= 64 bytes; keep it short.
@@ -21,24 +26,54 @@ class PendingSelection:
     url: str
 
     playlist_entries: list[PlaylistEntry]
-    selected_indices: set[int]
+    selected_index: Optional[int]
 
     heights: list[int]
     selected_height: Optional[int]
 
     created_at: float = field(default_factory=time.time)
 
+    # Rendered "index. title (m:ss)" button labels, filled by the playlist keyboard.
+    entry_labels: dict[int, str] = field(default_factory=dict)
+
 
 class InMemoryState:
     def __init__(self, *, ttl_sec: float = 24 * 60 * 60) -> None:
         self.pending: dict[str, PendingSelection] = {}
         self._ttl_sec = float(ttl_sec)
+        # (expires_at, token) min-heap; lets `create` drop sessions nobody came back to.
+        self._expiry: list[tuple[float, str]] = []
 
     def create(self, pending: PendingSelection) -> str:
+        self._sweep(time.time())
         token = new_token()
         self.pending[token] = pending
+        heapq.heappush(self._expiry, (pending.created_at + self._ttl_sec, token))
         return token
 
+    def _sweep(self, now: float) -> int:
+        expiry = self._expiry
+        removed = 0
+        while expiry and expiry[0][0] < now:
+            _, token = heapq.heappop(expiry)
+            if self.pending.pop(token, None) is not None:
+                removed += 1
+        return removed
+
+    def prune(self, *, max_entries: int = 10_000) -> int:
+        """Drop expired sessions; above `max_entries`, also the oldest live ones.
+
+        Returns the number of sessions removed.
+        """
+
+        removed = self._sweep(time.time())
+        expiry = self._expiry
+        while len(self.pending) > max_entries and expiry:
+            _, token = heapq.heappop(expiry)
+            if self.pending.pop(token, None) is not None:
+                removed += 1
+        return removed
+
     def get(self, token: str) -> Optional[PendingSelection]:
         pending = self.pending.get(token)
         if pending is None:
@@ -56,3 +91,13 @@ class InMemoryState:
             self.pending.pop(token, None)
             return None
         return self.pending.pop(token, None)
+
+
+async def prune_loop(state: InMemoryState, *, interval_sec: float = 60.0) -> None:
+    """Periodically evict expired selection sessions (run as a background task)."""
+
+    while True:
+        await asyncio.sleep(interval_sec)
+        removed = state.prune()
+        if removed:
+            logger.info("Pruned %s expired selection sessions (%s left)", removed, len(state.pending))
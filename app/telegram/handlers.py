@@ -4,17 +4,17 @@ import asyncio
 import logging
 from typing import Optional
 
-from telegram import Update
+from telegram import CallbackQuery, Update
 from telegram.constants import ParseMode
 from telegram.ext import CallbackQueryHandler, CommandHandler, ContextTypes, MessageHandler, filters
 
-from app.downloader import ProbeResult, find_ffmpeg, probe_url
+from app.downloader import probe_url
 from app.queue import DownloadJob
 from app.services import Services
 from app.state import PendingSelection
 
 from .keyboards import playlist_page_keyboard, quality_keyboard
-from .ui import italic
+from .ui import italic, jobs_ahead_text
 from .worker_loop import ensure_worker_running
 
 logger = logging.getLogger(__name__)
@@ -71,17 +71,19 @@ async def on_text_url(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         url,
     )
 
-    if not find_ffmpeg():
+    if not services.ffmpeg_path:
         await update.message.reply_text(_require_ffmpeg_text())
         return
 
-    status_msg = await update.message.reply_text(italic("Checking the link..."), parse_mode=ParseMode.HTML)
-
-    probe: ProbeResult = await asyncio.to_thread(
-        probe_url,
-        url,
-        ytdlp_js_runtime=cfg.ytdlp_js_runtime,
-        ytdlp_remote_components=cfg.ytdlp_remote_components,
+    # The status reply and the (slow) probe don't depend on each other; overlap them.
+    status_msg, probe = await asyncio.gather(
+        update.message.reply_text(italic("Checking the link..."), parse_mode=ParseMode.HTML),
+        asyncio.to_thread(
+            probe_url,
+            url,
+            ytdlp_js_runtime=cfg.ytdlp_js_runtime,
+            ytdlp_remote_components=cfg.ytdlp_remote_components,
+        ),
     )
 
     logger.info(
@@ -100,7 +102,7 @@ async def on_text_url(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         user_id=update.message.from_user.id,
         url=url,
         playlist_entries=probe.playlist_entries,
-        selected_indices=set(),
+        selected_index=None,
         heights=probe.heights,
         selected_height=None,
     )
@@ -132,7 +134,7 @@ async def on_text_url(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
         )
         return
 
-    pending.selected_indices = {1} if probe.playlist_entries else set()
+    pending.selected_index = 1 if probe.playlist_entries else None
     await enqueue_from_pending(context, token, progress_message_id=status_msg.message_id)
 
 
@@ -151,37 +153,63 @@ def _validate_selection_owner(update: Update, pending: PendingSelection) -> bool
     return True
 
 
-async def on_playlist_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    services: Services = context.application.bot_data["services"]
+_ACK_TASKS: set[asyncio.Task[None]] = set()
 
-    query = update.callback_query
-    if query is None or query.data is None:
-        return
 
-    await query.answer()
+async def _answer_quietly(query: CallbackQuery, text: Optional[str], show_alert: bool) -> None:
+    try:
+        await query.answer(text, show_alert=show_alert)
+    except Exception:
+        # Expired/duplicate queries can't be answered; nothing to do about it.
+        logger.debug("answerCallbackQuery failed", exc_info=True)
+
+
+def _ack(query: CallbackQuery, text: Optional[str] = None, *, show_alert: bool = False) -> None:
+    """Answer a callback query without waiting for the round-trip.
+
+    A query can be answered only once, so handlers call this exactly once, with
+    the alert text when validation fails.
+    """
+
+    task = asyncio.create_task(_answer_quietly(query, text, show_alert))
+    _ACK_TASKS.add(task)
+    task.add_done_callback(_ACK_TASKS.discard)
+
+
+async def on_playlist_callback(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    query: CallbackQuery,
+    token: str,
+    action: str,
+) -> None:
+    services: Services = context.application.bot_data["services"]
 
-    _, token, action = query.data.split(":", 2)
     pending = services.state.get(token)
     if pending is None:
+        _ack(query)
         await query.edit_message_text("This selection session has expired. Please send the link again.")
         return
 
     if not _validate_selection_owner(update, pending):
-        await query.answer("This selection is not for you.", show_alert=True)
-        return
-
-    if action == "noop":
+        _ack(query, "This selection is not for you.", show_alert=True)
         return
 
     # Backward compatibility: old buttons from previous versions
     if action in {"all", "none"}:
-        await query.answer("You can only select one file now", show_alert=True)
+        _ack(query, "You can only select one file now", show_alert=True)
+        return
+
+    if action == "done" and pending.selected_index is None:
+        _ack(query, "Select a file first", show_alert=True)
+        return
+
+    _ack(query)
+
+    if action == "noop":
         return
 
     if action == "done":
-        if not pending.selected_indices:
-            await query.answer("Select a file first", show_alert=True)
-            return
         if len(pending.heights) >= 2:
             await query.edit_message_text(
                 italic("Choose download quality:"),
@@ -206,7 +234,7 @@ async def on_playlist_callback(update: Update, context: ContextTypes.DEFAULT_TYP
 
     if action.startswith("t"):
         idx = int(action[1:])
-        pending.selected_indices = {idx}
+        pending.selected_index = idx
 
         if len(pending.heights) >= 2:
             await query.edit_message_text(
@@ -220,37 +248,56 @@ async def on_playlist_callback(update: Update, context: ContextTypes.DEFAULT_TYP
         return
 
 
-async def on_quality_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def on_quality_callback(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    query: CallbackQuery,
+    token: str,
+    action: str,
+) -> None:
     services: Services = context.application.bot_data["services"]
 
-    query = update.callback_query
-    if query is None or query.data is None:
-        return
-
-    await query.answer()
-
-    _, token, action = query.data.split(":", 2)
     pending = services.state.get(token)
     if pending is None:
+        _ack(query)
         await query.edit_message_text("This selection session has expired. Please send the link again.")
         return
 
     if not _validate_selection_owner(update, pending):
-        await query.answer("This selection is not for you.", show_alert=True)
+        _ack(query, "This selection is not for you.", show_alert=True)
         return
 
     if action == "best":
         pending.selected_height = None
-        await query.answer("Selected: best", show_alert=False)
+        _ack(query, "Selected: best")
         await enqueue_from_pending(context, token, progress_message_id=query.message.message_id)
         return
 
     if action.startswith("h"):
         pending.selected_height = int(action[1:])
-        await query.answer(f"Selected: up to {pending.selected_height}p", show_alert=False)
+        _ack(query, f"Selected: up to {pending.selected_height}p")
         await enqueue_from_pending(context, token, progress_message_id=query.message.message_id)
         return
 
+    _ack(query)
+
+
+async def on_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Single entry point for inline buttons: "<kind>:<token>:<action>"."""
+
+    query = update.callback_query
+    if query is None or query.data is None:
+        return
+
+    kind, _, rest = query.data.partition(":")
+    token, _, action = rest.partition(":")
+    if kind == "pl":
+        await on_playlist_callback(update, context, query, token, action)
+    elif kind == "q":
+        await on_quality_callback(update, context, query, token, action)
+    else:
+        _ack(query)
+
 
 async def enqueue_from_pending(
     context: ContextTypes.DEFAULT_TYPE,
@@ -267,10 +314,7 @@ async def enqueue_from_pending(
 
     playlist_items: Optional[str] = None
     if pending.playlist_entries:
-        chosen_idx = next(iter(sorted(pending.selected_indices)), None)
-        if chosen_idx is None:
-            chosen_idx = 1
-
+        chosen_idx = pending.selected_index if pending.selected_index is not None else 1
         playlist_items = str(chosen_idx)
         urls = [pending.url]
     else:
@@ -298,7 +342,7 @@ async def enqueue_from_pending(
     await context.bot.edit_message_text(
         chat_id=job.chat_id,
         message_id=job.progress_message_id,
-        text=italic(f"Added to the queue. Position: {pos}.\nPlease wait..."),
+        text=italic(f"Added to the queue. {jobs_ahead_text(pos)}.\nPlease wait..."),
         parse_mode=ParseMode.HTML,
     )
 
@@ -308,7 +352,6 @@ def build_handlers(services: Services):
     return [
         CommandHandler("start", cmd_start),
         CommandHandler("help", cmd_help),
-        CallbackQueryHandler(on_playlist_callback, pattern=r"^pl:"),
-        CallbackQueryHandler(on_quality_callback, pattern=r"^q:"),
+        CallbackQueryHandler(on_callback),
         MessageHandler(filters.TEXT & ~filters.COMMAND, on_text_url),
     ]
@@ -30,18 +30,24 @@ def playlist_page_keyboard(
     end = min(total, start + page_size)
 
     rows: list[list[InlineKeyboardButton]] = []
+    prefix = f"pl:{token}:"
+    labels = pending.entry_labels
+    selected = pending.selected_index
 
     for entry in pending.playlist_entries[start:end]:
-        checked = "🔘" if entry.index in pending.selected_indices else "⚪"
-        text = f"{checked} {entry.index}. {entry.title[:40]}{_fmt_duration(entry.duration_sec)}"
-        rows.append([InlineKeyboardButton(text=text, callback_data=f"pl:{token}:t{entry.index}")])
+        label = labels.get(entry.index)
+        if label is None:
+            label = f"{entry.index}. {entry.title[:40]}{_fmt_duration(entry.duration_sec)}"
+            labels[entry.index] = label
+        checked = "🔘" if entry.index == selected else "⚪"
+        rows.append([InlineKeyboardButton(text=f"{checked} {label}", callback_data=f"{prefix}t{entry.index}")])
 
     nav: list[InlineKeyboardButton] = []
     if page > 0:
-        nav.append(InlineKeyboardButton("⬅️", callback_data=f"pl:{token}:p{page-1}"))
-    nav.append(InlineKeyboardButton(f"{page+1}/{page_count}", callback_data=f"pl:{token}:noop"))
+        nav.append(InlineKeyboardButton("⬅️", callback_data=f"{prefix}p{page-1}"))
+    nav.append(InlineKeyboardButton(f"{page+1}/{page_count}", callback_data=f"{prefix}noop"))
     if page < page_count - 1:
-        nav.append(InlineKeyboardButton("➡️", callback_data=f"pl:{token}:p{page+1}"))
+        nav.append(InlineKeyboardButton("➡️", callback_data=f"{prefix}p{page+1}"))
     rows.append(nav)
 
     return InlineKeyboardMarkup(rows)
@@ -49,10 +55,11 @@ def playlist_page_keyboard(
 
 def quality_keyboard(token: str, heights: list[int]) -> InlineKeyboardMarkup:
     rows: list[list[InlineKeyboardButton]] = []
+    prefix = f"q:{token}:"
 
-    rows.append([InlineKeyboardButton("Best", callback_data=f"q:{token}:best")])
+    rows.append([InlineKeyboardButton("Best", callback_data=f"{prefix}best")])
 
     for h in heights[:6]:
-        rows.append([InlineKeyboardButton(f"Up to {h}p", callback_data=f"q:{token}:h{h}")])
+        rows.append([InlineKeyboardButton(f"Up to {h}p", callback_data=f"{prefix}h{h}")])
 
     return InlineKeyboardMarkup(rows)
@@ -1,43 +1,75 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-import shutil
-import subprocess
+import re
 from pathlib import Path
 from typing import Optional
 from urllib.parse import quote
 
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None
+
+from telegram import InputFile, InputMediaAudio, InputMediaDocument, InputMediaVideo
 from telegram.ext import Application
 
 logger = logging.getLogger(__name__)
 
+# orjson is optional; it parses ffprobe output faster than the stdlib.
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+# ffprobe results keyed on (path, size, mtime_ns, ffprobe); a changed file gets a
+# new key. Bounded FIFO: oldest entries are dropped first.
+_DIMS_CACHE: dict[tuple[str, int, int, str], Optional[tuple[int, int]]] = {}
+_DIMS_CACHE_MAX = 256
+
+
+async def _probe_video_dims(path: Path, *, ffprobe: Optional[str]) -> Optional[tuple[int, int]]:
+    """Video (width, height) for upload metadata; cached so retries don't re-run ffprobe."""
 
-def _probe_video_dims(path: Path) -> Optional[tuple[int, int]]:
-    ffprobe = shutil.which("ffprobe")
     if not ffprobe:
         return None
 
     try:
-        proc = subprocess.run(
-            [
-                ffprobe,
-                "-v",
-                "error",
-                "-select_streams",
-                "v:0",
-                "-show_entries",
-                "stream=width,height,sample_aspect_ratio:stream_tags=rotate",
-                "-of",
-                "json",
-                str(path),
-            ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=False,
+        st = path.stat()
+    except OSError:
+        return None
+
+    key = (str(path), st.st_size, st.st_mtime_ns, ffprobe)
+    if key in _DIMS_CACHE:
+        return _DIMS_CACHE[key]
+
+    dims = await _probe_video_dims_uncached(path, ffprobe=ffprobe)
+    if len(_DIMS_CACHE) >= _DIMS_CACHE_MAX:
+        del _DIMS_CACHE[next(iter(_DIMS_CACHE))]
+    _DIMS_CACHE[key] = dims
+    return dims
+
+
+async def _probe_video_dims_uncached(path: Path, *, ffprobe: str) -> Optional[tuple[int, int]]:
+
+    try:
+        # Async subprocess: the event loop keeps serving other chats while ffprobe runs.
+        proc = await asyncio.create_subprocess_exec(
+            ffprobe,
+            "-v",
+            "error",
+            "-select_streams",
+            "v:0",
+            "-show_entries",
+            "stream=width,height,sample_aspect_ratio:stream_tags=rotate",
+            "-of",
+            "json",
+            str(path),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
         )
-        data = json.loads(proc.stdout or "{}")
+        stdout, _ = await proc.communicate()
+        data = _json_loads(stdout or b"{}")
         streams = data.get("streams") or []
         if not streams or not isinstance(streams[0], dict):
             return None
@@ -73,6 +105,75 @@ def _probe_video_dims(path: Path) -> Optional[tuple[int, int]]:
         return None
 
 
+_VIDEO_EXTS = frozenset({".mp4", ".mkv", ".webm"})
+_AUDIO_EXTS = frozenset({".mp3", ".m4a", ".aac", ".wav", ".flac", ".ogg"})
+
+# Upload limit of the Bot API without a local (--local) server.
+_UPLOAD_LIMIT_BYTES = 50 * 1024 * 1024
+
+# sendMediaGroup accepts 2-10 items, all audio, all documents, or photos/videos.
+_MEDIA_GROUP_MAX = 10
+
+# Without a local server a group is read into memory and sent as one multipart
+# request; keep it within the single-file upload limit.
+_MEDIA_GROUP_MAX_BYTES = _UPLOAD_LIMIT_BYTES
+
+
+class FileTooLargeError(Exception):
+    """Files over the upload limit; nothing was sent for them."""
+
+    def __init__(self, paths: list[Path]) -> None:
+        super().__init__(", ".join(p.name for p in paths))
+        self.paths = paths
+
+
+def _media_kind(path: Path) -> str:
+    ext = path.suffix.lower()
+    if ext in _VIDEO_EXTS:
+        return "video"
+    if ext in _AUDIO_EXTS:
+        return "audio"
+    return "document"
+
+
+# Characters `quote(..., safe="/")` leaves untouched; such paths need no quoting.
+_URI_SAFE_PATH = re.compile(r"[A-Za-z0-9_.~/\-]*")
+
+
+def _local_file_uri(
+    abs_path: Path,
+    *,
+    local_path_from: Optional[Path],
+    local_path_to: Optional[Path],
+) -> str:
+    mapped_path = abs_path
+    if local_path_from and local_path_to:
+        try:
+            rel = abs_path.relative_to(local_path_from)
+            mapped_path = local_path_to / rel
+        except Exception:
+            logger.debug(
+                "Failed to map local path abs_path=%s local_from=%s local_to=%s",
+                abs_path,
+                local_path_from,
+                local_path_to,
+                exc_info=True,
+            )
+            mapped_path = abs_path
+
+    path_str = str(mapped_path)
+    return "file://" + (path_str if _URI_SAFE_PATH.fullmatch(path_str) else quote(path_str, safe="/"))
+
+
+async def _read_for_upload(path: Path, *, attach: bool = False) -> InputFile:
+    # PTB reads a passed file object in full, synchronously, on the event loop;
+    # do that read in a worker thread instead.
+    # `attach=True` is required inside InputMedia*: PTB only sends such files
+    # as attach:// parts; otherwise the media field is dropped from the request.
+    data = await asyncio.to_thread(path.read_bytes)
+    return InputFile(data, filename=path.name, attach=attach)
+
+
 async def send_file(
     application: Application,
     chat_id: int,
@@ -81,36 +182,29 @@ async def send_file(
     local_mode: bool,
     local_path_from: Optional[Path],
     local_path_to: Optional[Path],
+    ffprobe_path: Optional[str] = None,
 ) -> None:
     abs_path = path.resolve()
 
     logger.info("Sending file chat_id=%s path=%s local_mode=%s", chat_id, abs_path, local_mode)
 
-    ext = abs_path.suffix.lower()
-    is_video = ext in {".mp4", ".mkv", ".webm"}
-    is_audio = ext in {".mp3", ".m4a", ".aac", ".wav", ".flac", ".ogg"}
+    if not local_mode:
+        size = abs_path.stat().st_size
+        if size > _UPLOAD_LIMIT_BYTES:
+            # The Bot API would reject it only after the whole upload; fail up front.
+            logger.warning("File too large for upload size=%s path=%s", size, abs_path)
+            raise FileTooLargeError([path])
 
-    if local_mode:
-        mapped_path = abs_path
-        if local_path_from and local_path_to:
-            try:
-                rel = abs_path.relative_to(local_path_from)
-                mapped_path = local_path_to / rel
-            except Exception:
-                logger.debug(
-                    "Failed to map local path abs_path=%s local_from=%s local_to=%s",
-                    abs_path,
-                    local_path_from,
-                    local_path_to,
-                    exc_info=True,
-                )
-                mapped_path = abs_path
+    kind = _media_kind(abs_path)
+    is_video = kind == "video"
+    is_audio = kind == "audio"
 
-        uri = "file://" + quote(str(mapped_path), safe="/")
+    if local_mode:
+        uri = _local_file_uri(abs_path, local_path_from=local_path_from, local_path_to=local_path_to)
         logger.info("Sending via local file uri=%s", uri)
 
         if is_video:
-            dims = _probe_video_dims(abs_path)
+            dims = await _probe_video_dims(abs_path, ffprobe=ffprobe_path)
             extra: dict[str, int] = {}
             if dims is not None:
                 extra["width"], extra["height"] = dims
@@ -130,23 +224,122 @@ async def send_file(
         await application.bot.send_document(chat_id=chat_id, document=uri, caption=path.name)
         return
 
-    with abs_path.open("rb") as f:
-        if is_video:
-            dims = _probe_video_dims(abs_path)
-            extra: dict[str, int] = {}
-            if dims is not None:
-                extra["width"], extra["height"] = dims
-            await application.bot.send_video(
-                chat_id=chat_id,
-                video=f,
-                caption=path.name,
-                supports_streaming=True,
-                **extra,
-            )
-            return
+    upload = await _read_for_upload(abs_path)
 
-        if is_audio:
-            await application.bot.send_audio(chat_id=chat_id, audio=f, caption=path.name)
-            return
+    if is_video:
+        dims = await _probe_video_dims(abs_path, ffprobe=ffprobe_path)
+        extra: dict[str, int] = {}
+        if dims is not None:
+            extra["width"], extra["height"] = dims
+        await application.bot.send_video(
+            chat_id=chat_id,
+            video=upload,
+            caption=path.name,
+            supports_streaming=True,
+            **extra,
+        )
+        return
+
+    if is_audio:
+        await application.bot.send_audio(chat_id=chat_id, audio=upload, caption=path.name)
+        return
+
+    await application.bot.send_document(chat_id=chat_id, document=upload, caption=path.name)
+
+
+async def send_files(
+    application: Application,
+    chat_id: int,
+    paths: list[Path],
+    *,
+    local_mode: bool,
+    local_path_from: Optional[Path],
+    local_path_to: Optional[Path],
+    ffprobe_path: Optional[str] = None,
+) -> None:
+    """Send several files, batching runs of the same kind into media groups.
+
+    One sendMediaGroup request replaces up to ten sendVideo/sendAudio/sendDocument
+    calls. A run of a single file falls back to `send_file`. Without a local
+    server a group is also capped at `_MEDIA_GROUP_MAX_BYTES` in total.
+
+    Files over the upload limit are skipped; the rest are still sent, then
+    `FileTooLargeError` lists the skipped ones.
+    """
+
+    # Local mode sends file:// URIs, so sizes don't matter there. Otherwise an
+    # oversized file exceeds the byte cap and goes on its own; `send_file`
+    # rejects it.
+    sizes = {} if local_mode else {p: p.stat().st_size for p in paths}
+
+    batches: list[list[Path]] = []
+    batch_bytes = 0
+    for path in paths:
+        size = sizes.get(path, 0)
+        last = batches[-1] if batches else None
+        if (
+            last is not None
+            and len(last) < _MEDIA_GROUP_MAX
+            and batch_bytes + size <= _MEDIA_GROUP_MAX_BYTES
+            and _media_kind(last[0]) == _media_kind(path)
+        ):
+            last.append(path)
+            batch_bytes += size
+        else:
+            batches.append([path])
+            batch_bytes = size
+
+    too_large: list[Path] = []
+    for batch in batches:
+        if len(batch) == 1:
+            try:
+                await send_file(
+                    application,
+                    chat_id,
+                    batch[0],
+                    local_mode=local_mode,
+                    local_path_from=local_path_from,
+                    local_path_to=local_path_to,
+                    ffprobe_path=ffprobe_path,
+                )
+            except FileTooLargeError as exc:
+                too_large.extend(exc.paths)
+            continue
+
+        kind = _media_kind(batch[0])
+        logger.info(
+            "Sending media group chat_id=%s kind=%s files=%s local_mode=%s",
+            chat_id,
+            kind,
+            len(batch),
+            local_mode,
+        )
+
+        media: list[InputMediaVideo | InputMediaAudio | InputMediaDocument] = []
+        for path in batch:
+            abs_path = path.resolve()
+            source: str | InputFile
+            if local_mode:
+                source = _local_file_uri(
+                    abs_path,
+                    local_path_from=local_path_from,
+                    local_path_to=local_path_to,
+                )
+            else:
+                source = await _read_for_upload(abs_path, attach=True)
+
+            if kind == "video":
+                dims = await _probe_video_dims(abs_path, ffprobe=ffprobe_path)
+                extra: dict[str, int] = {}
+                if dims is not None:
+                    extra["width"], extra["height"] = dims
+                media.append(InputMediaVideo(media=source, caption=path.name, supports_streaming=True, **extra))
+            elif kind == "audio":
+                media.append(InputMediaAudio(media=source, caption=path.name))
+            else:
+                media.append(InputMediaDocument(media=source, caption=path.name))
+
+        await application.bot.send_media_group(chat_id=chat_id, media=media)
 
-        await application.bot.send_document(chat_id=chat_id, document=f, caption=path.name)
+    if too_large:
+        raise FileTooLargeError(too_large)
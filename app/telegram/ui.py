@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import html
 import logging
-from typing import TYPE_CHECKING
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Optional
 
 from telegram.constants import ParseMode
 
@@ -12,28 +13,90 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Last text sent through the safe_edit helpers per (chat_id, message_id), so a
+# repeated identical edit is skipped instead of costing a round-trip (and a
+# "message is not modified" error). Bounded LRU.
+_LAST_TEXT: OrderedDict[tuple[int, int], str] = OrderedDict()
+_LAST_TEXT_MAX = 10_000
+
+
+def _is_repeat(key: tuple[int, int], rendered: str) -> bool:
+    if _LAST_TEXT.get(key) == rendered:
+        _LAST_TEXT.move_to_end(key)
+        return True
+    return False
+
+
+def _remember(key: tuple[int, int], rendered: str) -> None:
+    _LAST_TEXT[key] = rendered
+    _LAST_TEXT.move_to_end(key)
+    if len(_LAST_TEXT) > _LAST_TEXT_MAX:
+        _LAST_TEXT.popitem(last=False)
+
+
+def forget_message(chat_id: int, message_id: int) -> None:
+    """Drop the remembered text, e.g. once a job is finished with its message."""
+
+    _LAST_TEXT.pop((chat_id, message_id), None)
+
 
 def italic(text: str) -> str:
     return f"<i>{html.escape(text)}</i>"
 
 
+def jobs_ahead_text(pos: int) -> str:
+    """Wording for a 1-based queue position.
+
+    Workers skip jobs whose chat is busy, so jobs can start out of queue order;
+    the count of earlier jobs is accurate where "Position: N" would not be.
+    """
+
+    ahead = pos - 1
+    if ahead <= 0:
+        return "No jobs ahead"
+    return "1 job ahead" if ahead == 1 else f"{ahead} jobs ahead"
+
+
+def rate_limit_kwargs(application: "Application", max_retries: Optional[int]) -> dict[str, Any]:
+    """Per-call `AIORateLimiter` override; empty when no rate limiter is configured.
+
+    Progress-style edits pass `max_retries=0`: on a flood wait they are dropped
+    (the next update supersedes them) instead of holding up final messages.
+    """
+
+    if max_retries is None or application.bot.rate_limiter is None:
+        return {}
+    return {"rate_limit_args": max_retries}
+
+
 async def safe_edit_italic(
     application: "Application",
     *,
     chat_id: int,
     message_id: int,
     text: str,
-) -> None:
+    max_retries: Optional[int] = None,
+) -> bool:
+    """Edit a message to italic `text`; False if the edit failed or was dropped."""
+
+    key = (chat_id, message_id)
+    rendered = italic(text)
+    if _is_repeat(key, rendered):
+        return True
     try:
         await application.bot.edit_message_text(
             chat_id=chat_id,
             message_id=message_id,
-            text=italic(text),
+            text=rendered,
             parse_mode=ParseMode.HTML,
+            **rate_limit_kwargs(application, max_retries),
         )
     except Exception:
         # Ignore edit errors (rate limit / message not modified / message deleted).
         logger.debug("safe_edit_italic failed", exc_info=True)
+        return False
+    _remember(key, rendered)
+    return True
 
 
 async def safe_edit_plain(
@@ -42,13 +105,21 @@ async def safe_edit_plain(
     chat_id: int,
     message_id: int,
     text: str,
-) -> None:
+    max_retries: Optional[int] = None,
+) -> bool:
+    key = (chat_id, message_id)
+    if _is_repeat(key, text):
+        return True
     try:
         await application.bot.edit_message_text(
             chat_id=chat_id,
             message_id=message_id,
             text=text,
+            **rate_limit_kwargs(application, max_retries),
         )
     except Exception:
         # Ignore edit errors (rate limit / message not modified / message deleted).
         logger.debug("safe_edit_plain failed", exc_info=True)
+        return False
+    _remember(key, text)
+    return True
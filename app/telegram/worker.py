@@ -1,26 +1,134 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import time
 from typing import Optional
 
 from telegram.ext import Application
 
 from app.queue import DownloadJob, DownloadQueue
-from app.telegram.ui import safe_edit_italic
+from app.telegram.ui import jobs_ahead_text, safe_edit_italic
+
+
+class ProgressFlusher:
+    """Coalesces progress-message edits across all jobs.
+
+    Producers only stage the latest text per message; a background task sends
+    staged texts every `interval` seconds, skipping intermediate states and
+    texts identical to the last one sent.
+    """
+
+    def __init__(self, application: Application, *, interval: float) -> None:
+        self._application = application
+        self._interval = interval
+        self._staged: dict[tuple[int, int], str] = {}
+        self._sent: dict[tuple[int, int], str] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def set(self, chat_id: int, message_id: int, text: str) -> None:
+        self._staged[(chat_id, message_id)] = text
+        if self._task is None or self._task.done():
+            self._task = self._application.create_task(self._run())
+
+    async def discard(self, chat_id: int, message_id: int) -> None:
+        """Drop staged text for a message and wait for an in-flight edit of it.
+
+        Call before editing the message directly, so a late progress edit cannot
+        overwrite the final text.
+        """
+
+        key = (chat_id, message_id)
+        async with self._lock:
+            self._staged.pop(key, None)
+            self._sent.pop(key, None)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            staged, self._staged = self._staged, {}
+            edits = [(key, text) for key, text in staged.items() if self._sent.get(key) != text]
+            for key, text in edits:
+                self._sent[key] = text
+            await asyncio.gather(
+                *(
+                    safe_edit_italic(
+                        self._application,
+                        chat_id=chat_id,
+                        message_id=message_id,
+                        text=text,
+                        max_retries=0,
+                    )
+                    for (chat_id, message_id), text in edits
+                )
+            )
+
+    async def stop(self) -> None:
+        task = self._task
+        self._task = None
+        if task is None or task.done():
+            return
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    async def _run(self) -> None:
+        # Exits once idle; the next `set` starts a new task.
+        while self._staged:
+            await asyncio.sleep(self._interval)
+            await self.flush()
+
+
+def get_progress_flusher(application: Application, *, interval: float) -> ProgressFlusher:
+    flusher = application.bot_data.get("progress_flusher")
+    if flusher is None:
+        flusher = ProgressFlusher(application, interval=interval)
+        application.bot_data["progress_flusher"] = flusher
+    return flusher
+
+
+# Upper bound on position edits per call; the rest catch up on later calls.
+_MAX_QUEUE_EDITS_PER_TICK = 10
 
 
 async def update_waiting_queue_positions(application: Application, queue: DownloadQueue) -> None:
-    """Update the displayed queue position for all waiting jobs."""
+    """Update the displayed queue position for waiting jobs whose position changed."""
 
     waiting: list[DownloadJob] = await queue.snapshot()
+    shown = queue.shown_positions
+    changed: list[tuple[int, DownloadJob]] = []
     for pos, job in enumerate(waiting, start=1):
-        await safe_edit_italic(
-            application,
-            chat_id=job.chat_id,
-            message_id=job.progress_message_id,
-            text=f"In queue. Position: {pos}.\nPlease wait...",
+        key = (job.chat_id, job.progress_message_id)
+        if shown.get(key) == pos:
+            continue
+        changed.append((pos, job))
+        if len(changed) >= _MAX_QUEUE_EDITS_PER_TICK:
+            break
+
+    if not changed:
+        return
+
+    # Edits dropped under flood control (max_retries=0) return False; their
+    # position stays unrecorded so a later call re-sends it.
+    sent = await asyncio.gather(
+        *(
+            safe_edit_italic(
+                application,
+                chat_id=job.chat_id,
+                message_id=job.progress_message_id,
+                text=f"In queue. {jobs_ahead_text(pos)}.\nPlease wait...",
+                max_retries=0,
+            )
+            for pos, job in changed
         )
+    )
+
+    # A job taken by a worker meanwhile has left `shown`; don't re-add it.
+    still_waiting = {(job.chat_id, job.progress_message_id) for job in await queue.snapshot()}
+    for (pos, job), ok in zip(changed, sent):
+        key = (job.chat_id, job.progress_message_id)
+        if ok and key in still_waiting:
+            shown[key] = pos
 
 
 async def progress_updater(
@@ -32,6 +140,8 @@ async def progress_updater(
     min_interval: float,
     stall_interval: float,
 ) -> None:
+    flusher = get_progress_flusher(application, interval=min_interval)
+
     last_sent_percent = -1
     last_sent_time = 0.0
     start_time = time.monotonic()
@@ -55,12 +165,7 @@ async def progress_updater(
 
                 last_progress_time = now
                 last_sent_time = now
-                await safe_edit_italic(
-                    application,
-                    chat_id=chat_id,
-                    message_id=message_id,
-                    text="Processing...",
-                )
+                flusher.set(chat_id, message_id, "Processing...")
                 continue
 
             if percent is None:
@@ -78,12 +183,7 @@ async def progress_updater(
             last_sent_percent = percent_int
             last_sent_time = now
 
-            await safe_edit_italic(
-                application,
-                chat_id=chat_id,
-                message_id=message_id,
-                text=f"Downloading... {percent_int}%",
-            )
+            flusher.set(chat_id, message_id, f"Downloading... {percent_int}%")
 
         except asyncio.TimeoutError:
             now = time.monotonic()
@@ -104,9 +204,4 @@ async def progress_updater(
                     text = f"Downloading... {last_seen_percent}% (no progress for {stalled_min}:{stalled_sec:02d})"
 
             last_sent_time = now
-            await safe_edit_italic(
-                application,
-                chat_id=chat_id,
-                message_id=message_id,
-                text=text,
-            )
+            flusher.set(chat_id, message_id, text)
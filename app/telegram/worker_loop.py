@@ -4,6 +4,7 @@ import asyncio
 import contextlib
 import logging
 import shutil
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
@@ -11,11 +12,12 @@ from telegram.ext import Application
 from telegram.constants import ParseMode
 
 from app.downloader import download_urls, ensure_session_dir
+from app.queue import DownloadJob
 from app.services import Services
 
-from .send import send_file
-from .ui import italic, safe_edit_italic
-from .worker import progress_updater, update_waiting_queue_positions
+from .send import FileTooLargeError, send_files
+from .ui import forget_message, italic, safe_edit_italic
+from .worker import get_progress_flusher, progress_updater, update_waiting_queue_positions
 
 logger = logging.getLogger(__name__)
 
@@ -43,152 +45,279 @@ def _cleanup_session_dir(*, session_dir: Path, download_root: Path) -> None:
         logger.warning("Failed to cleanup session dir: %s", session_dir, exc_info=True)
 
 
+def _cleanup_sent_files(files: list[Path], *, session_dir: Path, download_root: Path) -> None:
+    for p in files:
+        try:
+            p.unlink(missing_ok=True)
+        except Exception:
+            logger.warning("Failed to delete sent file: %s", p, exc_info=True)
+
+    _cleanup_session_dir(session_dir=session_dir, download_root=download_root)
+
+
+@dataclass(frozen=True)
+class _PreparedJob:
+    job: DownloadJob
+    session_dir: Path
+    files: list[Path]
+
+
+_DOWNLOAD_WORKER = "download-worker"
+_UPLOAD_WORKER = "upload-worker"
+
+
 def ensure_worker_running(application: Application) -> None:
-    task = application.bot_data.get("worker_task")
-    if task is not None and getattr(task, "done", None) and not task.done():
-        return
+    services: Services = application.bot_data["services"]
+    n = max(1, services.config.worker_concurrency)
+    tasks = [t for t in application.bot_data.get("worker_tasks") or [] if not t.done()]
+
+    started = 0
+    for name, loop_fn in ((_DOWNLOAD_WORKER, worker_loop), (_UPLOAD_WORKER, upload_loop)):
+        running = sum(1 for t in tasks if t.get_name() == name)
+        for _ in range(n - running):
+            tasks.append(application.create_task(loop_fn(application), name=name))
+            started += 1
+
+    application.bot_data["worker_tasks"] = tasks
+    if started:
+        logger.info("Worker tasks (re)started: %s", started)
+
 
-    new_task = application.create_task(worker_loop(application))
-    application.bot_data["worker_task"] = new_task
-    logger.info("Worker task (re)started")
+def _upload_queue(application: Application) -> asyncio.Queue[_PreparedJob]:
+    queue = application.bot_data.get("upload_queue")
+    if queue is None:
+        services: Services = application.bot_data["services"]
+        # Bounded: a downloader waits (holding its files on disk) while uploads catch up.
+        queue = asyncio.Queue(maxsize=max(1, services.config.worker_concurrency))
+        application.bot_data["upload_queue"] = queue
+    return queue
 
 
 async def worker_loop(application: Application) -> None:
+    """Download stage: take queued jobs, download them, hand the files to `upload_loop`.
+
+    Download of the next job overlaps with upload of the previous one.
+    """
+
     services: Services = application.bot_data["services"]
-    cfg = services.config
+    upload_queue = _upload_queue(application)
+
+    # Chats with a job in progress (downloading or uploading). Workers skip their
+    # queued jobs, so one chat's jobs run in order while other chats are not held
+    # up behind them.
+    busy_chats: set[int] = application.bot_data.setdefault("busy_chats", set())
 
     logger.info("Worker loop started")
 
     try:
         while True:
-            job = await services.queue.get()
-            await update_waiting_queue_positions(application, services.queue)
+            job = await services.queue.get(skip_chats=busy_chats)
+            busy_chats.add(job.chat_id)
+            handed_off = False
+            try:
+                await update_waiting_queue_positions(application, services.queue)
+                prepared = await _download_job(application, services, job)
+                if prepared is not None:
+                    await upload_queue.put(prepared)
+                    handed_off = True
+            finally:
+                if not handed_off:
+                    busy_chats.discard(job.chat_id)
+                    await services.queue.wake()
+
+    except asyncio.CancelledError:
+        logger.info("Worker loop cancelled")
+        raise
+
+
+async def upload_loop(application: Application) -> None:
+    """Upload stage: send downloaded files and finish the job."""
 
-            session_dir: Optional[Path] = None
-            job_success = False
+    services: Services = application.bot_data["services"]
+    upload_queue = _upload_queue(application)
+    busy_chats: set[int] = application.bot_data.setdefault("busy_chats", set())
 
+    try:
+        while True:
+            prepared = await upload_queue.get()
             try:
-                await application.bot.edit_message_text(
-                    chat_id=job.chat_id,
-                    message_id=job.progress_message_id,
-                    text=italic("Starting download... 0%"),
-                    parse_mode=ParseMode.HTML,
-                )
+                await _upload_job(application, services, prepared)
+            finally:
+                busy_chats.discard(prepared.job.chat_id)
+                await services.queue.wake()
 
-                logger.info(
-                    "Start job chat_id=%s urls=%s max_height=%s request_url=%s",
-                    job.chat_id,
-                    len(job.urls),
-                    job.max_height,
-                    job.request_url,
-                )
+    except asyncio.CancelledError:
+        logger.info("Upload loop cancelled")
+        raise
 
-                session_dir = ensure_session_dir(cfg.download_root)
-                logger.info("Session dir: %s", session_dir)
 
-                loop = asyncio.get_running_loop()
-                progress_updates: asyncio.Queue[tuple[str, Optional[float]]] = asyncio.Queue()
+async def _report_failure(application: Application, job: DownloadJob) -> None:
+    await application.bot.edit_message_text(
+        chat_id=job.chat_id,
+        message_id=job.progress_message_id,
+        text=(
+            "This service cannot download from this URL:\n"
+            f"{job.request_url}\n\n"
+            "Please try a different link."
+        ),
+    )
 
-                def progress_cb(phase: str, percent: Optional[float]) -> None:
-                    loop.call_soon_threadsafe(progress_updates.put_nowait, (phase, percent))
 
-                progress_task = application.create_task(
-                    progress_updater(
-                        application=application,
-                        chat_id=job.chat_id,
-                        message_id=job.progress_message_id,
-                        progress_updates=progress_updates,
-                        min_interval=cfg.progress_min_interval_sec,
-                        stall_interval=cfg.progress_stall_interval_sec,
-                    )
-                )
+async def _download_job(application: Application, services: Services, job: DownloadJob) -> Optional[_PreparedJob]:
+    """Download a job's files; None if there is nothing to upload (already reported)."""
 
-                try:
-                    files = await asyncio.to_thread(
-                        download_urls,
-                        job.urls,
-                        output_dir=session_dir,
-                        max_height=job.max_height,
-                        playlist_items=job.playlist_items,
-                        progress_cb=progress_cb,
-                        ytdlp_js_runtime=cfg.ytdlp_js_runtime,
-                        ytdlp_remote_components=cfg.ytdlp_remote_components,
-                    )
-                finally:
-                    progress_task.cancel()
-                    with contextlib.suppress(asyncio.CancelledError):
-                        await progress_task
-
-                if not files:
-                    logger.warning("Job finished but no files found. session_dir=%s", session_dir)
-                    await application.bot.edit_message_text(
-                        chat_id=job.chat_id,
-                        message_id=job.progress_message_id,
-                        text="Download finished, but the file was not found.",
-                    )
-                    continue
-
-                await safe_edit_italic(
-                    application,
-                    chat_id=job.chat_id,
-                    message_id=job.progress_message_id,
-                    text="Download completed... 100%",
-                )
+    cfg = services.config
 
-                for idx, p in enumerate(files, start=1):
-                    prefix = "Uploading file to Telegram"
-                    if len(files) > 1:
-                        prefix = f"Uploading file to Telegram ({idx}/{len(files)})"
-
-                    await safe_edit_italic(
-                        application,
-                        chat_id=job.chat_id,
-                        message_id=job.progress_message_id,
-                        text=f"{prefix}...",
-                    )
-
-                    await send_file(
-                        application,
-                        job.chat_id,
-                        p,
-                        local_mode=cfg.bot_local_mode,
-                        local_path_from=cfg.bot_api_local_path_from,
-                        local_path_to=cfg.bot_api_local_path_to,
-                    )
-
-                    try:
-                        p.unlink(missing_ok=True)
-                    except Exception:
-                        logger.warning("Failed to delete sent file: %s", p, exc_info=True)
-
-                job_success = True
-
-                await application.bot.edit_message_text(
-                    chat_id=job.chat_id,
-                    message_id=job.progress_message_id,
-                    text="Done.",
-                )
+    try:
+        await application.bot.edit_message_text(
+            chat_id=job.chat_id,
+            message_id=job.progress_message_id,
+            text=italic("Starting download... 0%"),
+            parse_mode=ParseMode.HTML,
+        )
+
+        logger.info(
+            "Start job chat_id=%s urls=%s max_height=%s request_url=%s",
+            job.chat_id,
+            len(job.urls),
+            job.max_height,
+            job.request_url,
+        )
+
+        session_dir = ensure_session_dir(cfg.download_root)
+        logger.info("Session dir: %s", session_dir)
+
+        loop = asyncio.get_running_loop()
+        progress_updates: asyncio.Queue[tuple[str, Optional[float]]] = asyncio.Queue()
+
+        def progress_cb(phase: str, percent: Optional[float]) -> None:
+            loop.call_soon_threadsafe(progress_updates.put_nowait, (phase, percent))
+
+        progress_task = application.create_task(
+            progress_updater(
+                application=application,
+                chat_id=job.chat_id,
+                message_id=job.progress_message_id,
+                progress_updates=progress_updates,
+                min_interval=cfg.progress_min_interval_sec,
+                stall_interval=cfg.progress_stall_interval_sec,
+            )
+        )
+
+        download_kwargs = dict(
+            urls=job.urls,
+            output_dir=session_dir,
+            max_height=job.max_height,
+            playlist_items=job.playlist_items,
+            ytdlp_js_runtime=cfg.ytdlp_js_runtime,
+            ytdlp_remote_components=cfg.ytdlp_remote_components,
+        )
+        try:
+            if services.download_pool is not None:
+                files = await services.download_pool.run(progress_cb=progress_cb, **download_kwargs)
+            else:
+                files = await asyncio.to_thread(download_urls, progress_cb=progress_cb, **download_kwargs)
+        finally:
+            progress_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await progress_task
+            await get_progress_flusher(
+                application, interval=cfg.progress_min_interval_sec
+            ).discard(job.chat_id, job.progress_message_id)
+
+        if not files:
+            logger.warning("Job finished but no files found. session_dir=%s", session_dir)
+            forget_message(job.chat_id, job.progress_message_id)
+            await application.bot.edit_message_text(
+                chat_id=job.chat_id,
+                message_id=job.progress_message_id,
+                text="Download finished, but the file was not found.",
+            )
+            return None
+
+        await safe_edit_italic(
+            application,
+            chat_id=job.chat_id,
+            message_id=job.progress_message_id,
+            text="Download completed... 100%",
+        )
+        return _PreparedJob(job=job, session_dir=session_dir, files=files)
+
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        logger.exception("Job failed: %s", exc)
+        forget_message(job.chat_id, job.progress_message_id)
+        await _report_failure(application, job)
+        return None
 
-                logger.info("Job done chat_id=%s files=%s", job.chat_id, len(files))
-
-            except asyncio.CancelledError:
-                raise
-            except Exception as exc:
-                logger.exception("Job failed: %s", exc)
-                await application.bot.edit_message_text(
-                    chat_id=job.chat_id,
-                    message_id=job.progress_message_id,
-                    text=(
-                        "This service cannot download from this URL:\n"
-                        f"{job.request_url}\n\n"
-                        "Please try a different link."
-                    ),
-                )
-            finally:
-                if job_success and session_dir is not None:
-                    _cleanup_session_dir(session_dir=session_dir, download_root=cfg.download_root)
+
+async def _upload_job(application: Application, services: Services, prepared: _PreparedJob) -> None:
+    cfg = services.config
+    job = prepared.job
+    files = prepared.files
+    # Set once nothing more can be done with the session's files.
+    cleanup = False
+
+    try:
+        prefix = "Uploading file to Telegram"
+        if len(files) > 1:
+            prefix = f"Uploading {len(files)} files to Telegram"
+
+        await safe_edit_italic(
+            application,
+            chat_id=job.chat_id,
+            message_id=job.progress_message_id,
+            text=f"{prefix}...",
+        )
+
+        await send_files(
+            application,
+            job.chat_id,
+            files,
+            local_mode=cfg.bot_local_mode,
+            local_path_from=cfg.bot_api_local_path_from,
+            local_path_to=cfg.bot_api_local_path_to,
+            ffprobe_path=services.ffprobe_path,
+        )
+
+        cleanup = True
+
+        await application.bot.edit_message_text(
+            chat_id=job.chat_id,
+            message_id=job.progress_message_id,
+            text="Done.",
+        )
+
+        logger.info("Job done chat_id=%s files=%s", job.chat_id, len(files))
 
     except asyncio.CancelledError:
-        logger.info("Worker loop cancelled")
-        application.bot_data["worker_task"] = None
         raise
+    except FileTooLargeError as exc:
+        logger.warning("Job incomplete chat_id=%s too_large=%s", job.chat_id, exc)
+        # Nothing retries an oversized file; the session would only leak disk.
+        cleanup = True
+        names = "\n".join(p.name for p in exc.paths)
+        await application.bot.edit_message_text(
+            chat_id=job.chat_id,
+            message_id=job.progress_message_id,
+            text=(
+                f"Too large to send (over 50 MB):\n{names}\n\n"
+                "Set up a local Bot API server (BOT_LOCAL_MODE) to send larger files."
+            ),
+        )
+    except Exception as exc:
+        logger.exception("Job failed: %s", exc)
+        await _report_failure(application, job)
+    finally:
+        forget_message(job.chat_id, job.progress_message_id)
+        if cleanup:
+            # Deleting large files can take a while; don't hold up the next upload.
+            application.create_task(
+                asyncio.to_thread(
+                    _cleanup_sent_files,
+                    files,
+                    session_dir=prepared.session_dir,
+                    download_root=cfg.download_root,
+                )
+            )
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import hashlib
+import itertools
+import json
 import os
+import queue
+import re
 import sys
 import textwrap
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Optional
 
 try:
     from yt_dlp import YoutubeDL
@@ -16,6 +24,11 @@ except Exception as exc:  # pragma: no cover
         "Package 'yt-dlp' was not found. Install dependencies: pip install -r requirements.txt"
     ) from exc
 
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover
+    orjson = None
+
 # Reuse implementation shared with the bot.
 from app.config import load_ytdlp_config
 from app.downloader import (
@@ -31,6 +44,21 @@ from app.downloader import (
 # Default output path. You can change it here.
 DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parent / "downloads"
 
+_START_TEMPLATE = textwrap.dedent(
+    """\
+    Starting download…
+    URL: {url}
+    Folder: {session_dir}
+    """
+).rstrip()
+
+# Extracted metadata is cached here so repeated runs on the same URL skip the
+# (slow) extraction.
+_METADATA_CACHE_DIR = (
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "telegram-media-fetcher"
+)
+_METADATA_CACHE_TTL_SEC = 60 * 60
+
 
 class _SilentYtDlpLogger:
     def debug(self, msg: str) -> None:
@@ -44,6 +72,21 @@ class _SilentYtDlpLogger:
         return
 
 
+# Options shared by every metadata extract; per-call params are applied on top.
+_BASE_PROBE_OPTS: Dict[str, Any] = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "logger": _SilentYtDlpLogger(),
+}
+
+
+# Probe-only: skip fetching YouTube's DASH/HLS manifests (1-2 MB each); the
+# progressive formats are enough to tell whether a URL works and which heights
+# exist. The download itself still sees every format.
+_SKIP_MANIFESTS: Dict[str, Any] = {"extractor_args": {"youtube": {"skip": ["dash", "hls"]}}}
+
+
 def _report_cannot_download(url: str, exc: BaseException) -> None:
     print("\nThis service cannot download from this URL:")
     print(url)
@@ -53,6 +96,141 @@ def _report_cannot_download(url: str, exc: BaseException) -> None:
         print(details)
 
 
+# Options that differ between runs without affecting the result: the logger
+# instance, and the User-Agent yt-dlp picks at random.
+_CACHE_KEY_IGNORED = frozenset({"logger", "http_headers"})
+
+
+def _metadata_cache_key(url: str, opts: Dict[str, Any]) -> str:
+    def _default(value: Any) -> Any:
+        if isinstance(value, (set, frozenset)):
+            return sorted(value)
+        return repr(value)
+
+    keyed = {k: v for k, v in opts.items() if k not in _CACHE_KEY_IGNORED}
+    raw = url + "\0" + json.dumps(keyed, sort_keys=True, default=_default)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _cached_extract_info(
+    ydl: YoutubeDL,
+    url: str,
+    params: Dict[str, Any],
+    *,
+    use_cache: bool = True,
+    refresh: bool = False,
+    ttl: float = _METADATA_CACHE_TTL_SEC,
+) -> Any:
+    """`ydl.extract_info(url, download=False)` with `params` applied for this call only.
+
+    Reusing one YoutubeDL keeps its HTTP connections and cookies across extracts.
+    The result is cached on disk for `ttl` seconds: `refresh` skips the cached
+    copy but stores the new result; `use_cache=False` bypasses the cache
+    entirely. Live streams are never cached.
+    """
+
+    saved = {k: ydl.params[k] for k in params if k in ydl.params}
+    ydl.params.update(params)
+    try:
+        return _extract_info_with_cache(ydl, url, use_cache=use_cache, refresh=refresh, ttl=ttl)
+    finally:
+        for k in params:
+            if k in saved:
+                ydl.params[k] = saved[k]
+            else:
+                ydl.params.pop(k, None)
+
+
+# Cache files are JSON rather than pickle: loading them can't run code, and
+# orjson (optional) parses large playlist dicts several times faster than the
+# stdlib. Values JSON can't hold are stored as their str().
+def _dump_info(info: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(info, option=orjson.OPT_NON_STR_KEYS, default=str)
+    return json.dumps(info, default=str).encode("utf-8")
+
+
+def _load_info(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _extract_info_with_cache(
+    ydl: YoutubeDL,
+    url: str,
+    *,
+    use_cache: bool,
+    refresh: bool,
+    ttl: float,
+) -> Any:
+    path = _METADATA_CACHE_DIR / f"{_metadata_cache_key(url, ydl.params)}.json"
+
+    if use_cache and not refresh:
+        try:
+            if time.time() - path.stat().st_mtime < ttl:
+                return _load_info(path.read_bytes())
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # A corrupt or unreadable entry is just a cache miss.
+            pass
+
+    info = ydl.extract_info(url, download=False)
+
+    if use_cache and isinstance(info, dict) and not info.get("is_live"):
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            _METADATA_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(_dump_info(info))
+            os.replace(tmp, path)
+        except Exception:
+            # Caching is best-effort (e.g. read-only home, unserializable info).
+            with contextlib.suppress(OSError):
+                tmp.unlink(missing_ok=True)
+        else:
+            _prune_metadata_cache(ttl)
+
+    return info
+
+
+def _prune_metadata_cache(ttl: float) -> None:
+    """Delete cache entries (and leftover temp files) older than `ttl`."""
+
+    cutoff = time.time() - ttl
+    try:
+        with os.scandir(_METADATA_CACHE_DIR) as entries:
+            for entry in entries:
+                if not entry.name.endswith((".json", ".tmp")):
+                    continue
+                with contextlib.suppress(OSError):
+                    if entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+    except OSError:
+        pass
+
+
+_SINGLE_VIDEO_URL_RES = tuple(
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"^https?://(?:www\.)?youtu\.be/[\w-]{11}(?:[?#]|$)",
+        r"^https?://(?:www\.|m\.)?youtube\.com/watch\?(?:.*&)?v=[\w-]{11}(?:[&#]|$)",
+        r"^https?://(?:www\.|m\.)?youtube\.com/shorts/[\w-]+",
+        r"^https?://[^?#]+\.(?:mp4|mkv|webm|m4a|mp3)(?:[?#]|$)",
+    )
+)
+_PLAYLIST_PARAM_RE = re.compile(r"[?&]list=")
+
+
+def _looks_like_single_video(url: str) -> bool:
+    """True for URL shapes that always point to one video (no playlist probe needed)."""
+
+    # watch?v=...&list=... is a playlist to yt-dlp unless noplaylist is set.
+    if _PLAYLIST_PARAM_RE.search(url):
+        return False
+    return any(r.search(url) for r in _SINGLE_VIDEO_URL_RES)
+
+
 def _extract_first_entry(info: Dict[str, Any]) -> Dict[str, Any]:
     # If URL is a playlist/feed, yt-dlp may return a playlist dict.
     if info.get("_type") == "playlist":
@@ -76,69 +254,97 @@ def _format_entry_label(entry: Dict[str, Any], index: int) -> str:
     return f"{index:>3}) {str(title).strip()}{dur_str}"
 
 
+# One selection item: "7" or "2-10" (spaces allowed around the dash).
+_SEL_ITEM_RE = re.compile(r"(\d+)(?:\s*-\s*(\d+))?")
+# What may separate two items: at least one "," or ";".
+_SEL_SEP_RE = re.compile(r"\s*[,;][\s,;]*")
+_SEL_EDGE_RE = re.compile(r"[\s,;]*")
+
+
 def _parse_selection(selection: str, *, max_index: int) -> list[int]:
-    # 1-based indices. Supports: "a", "1,3,5", "2-7".
-    s = selection.strip().lower()
-    if s in {"a", "all", "*"}:
-        return list(range(1, max_index + 1))
-
-    result: set[int] = set()
-    parts = [p.strip() for p in s.replace(";", ",").split(",") if p.strip()]
-    for part in parts:
-        if "-" in part:
-            left, right = [x.strip() for x in part.split("-", 1)]
-            if not left.isdigit() or not right.isdigit():
-                raise ValueError
-            a = int(left)
-            b = int(right)
-            if a <= 0 or b <= 0:
-                raise ValueError
-            start = min(a, b)
-            end = max(a, b)
-            if end > max_index:
-                raise ValueError
-            for i in range(start, end + 1):
-                result.add(i)
-        else:
-            if not part.isdigit():
-                raise ValueError
-            i = int(part)
-            if i <= 0 or i > max_index:
-                raise ValueError
-            result.add(i)
+    # 1-based indices. Supports: "1,3,5", "2-7" ("all" is handled by the caller).
+    s = selection.strip()
+
+    # One bitmap byte per index: ranges are filled by slice assignment, and
+    # reading the bitmap back yields the indices already sorted and de-duplicated.
+    selected = bytearray(max_index + 1)
+    pos = 0
+    for m in _SEL_ITEM_RE.finditer(s):
+        gap_re = _SEL_SEP_RE if pos else _SEL_EDGE_RE
+        if not gap_re.fullmatch(s, pos, m.start()):
+            raise ValueError
+        pos = m.end()
+
+        a = int(m.group(1))
+        b = int(m.group(2)) if m.group(2) is not None else a
+        if a <= 0 or b <= 0:
+            raise ValueError
+        start = min(a, b)
+        end = max(a, b)
+        if end > max_index:
+            raise ValueError
+        selected[start : end + 1] = b"\x01" * (end + 1 - start)
+
+    if not _SEL_EDGE_RE.fullmatch(s, pos):
+        raise ValueError
 
+    result = [i for i, flag in enumerate(selected) if flag]
     if not result:
         raise ValueError
-    return sorted(result)
+    return result
+
+
+_QUIT_WORDS = frozenset({"q", "quit", "exit"})
+_ALL_WORDS = frozenset({"a", "all", "*"})
 
 
-def _choose_playlist_entries(entries: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
-    total = len(entries)
-    print(f"Multiple videos were found at the URL: {total}.")
+def _choose_playlist_entries(entries: Iterable[Dict[str, Any]], *, total: int) -> list[Dict[str, Any]]:
+    """Ask which of the `total` entries to download.
+
+    `entries` is consumed lazily: only the preview, plus whatever the selection
+    reaches beyond it, is pulled.
+    """
 
     # Show a preview list; for large lists, show the first N.
     preview_count = min(total, 30)
-    for idx in range(1, preview_count + 1):
-        print(_format_entry_label(entries[idx - 1], idx))
+    remaining = iter(entries)
+    pulled = list(itertools.islice(remaining, preview_count))
+
+    # Build the whole listing and write it at once.
+    lines = [f"Multiple videos were found at the URL: {total}."]
+    lines.extend(_format_entry_label(entry, idx) for idx, entry in enumerate(pulled, start=1))
     if total > preview_count:
-        print(f"... and {total - preview_count} more (you can select by number).")
+        lines.append(f"... and {total - preview_count} more (you can select by number).")
+    lines.append("")
+    sys.stdout.write("\n".join(lines))
 
-    print(
+    sys.stdout.write(
         "Choose which videos to download (e.g. 1,3,5 or 2-10).\n"
-        "Enter 'a' to download all, or 'q' to cancel:"
+        "Enter 'a' to download all, or 'q' to cancel:\n"
     )
+    sys.stdout.flush()
 
     while True:
         raw = input("> ").strip()
-        if raw.lower() in {"q", "quit", "exit"}:
+        word = raw.lower()
+        if word in _QUIT_WORDS:
             raise KeyboardInterrupt
+        if word in _ALL_WORDS:
+            pulled.extend(remaining)
+            return pulled
         try:
             indices = _parse_selection(raw, max_index=total)
-            return [entries[i - 1] for i in indices]
+            if indices[-1] > len(pulled):
+                pulled.extend(itertools.islice(remaining, indices[-1] - len(pulled)))
+            return [pulled[i - 1] for i in indices]
         except Exception:
             print("Invalid input. Example: 1,3,5 or 2-10 or a")
 
 
+# The quality menu lists at most this many heights.
+_QUALITY_PRESETS_MAX = 6
+
+
 def _prompt_quality_choice(heights: list[int]) -> Optional[int]:
     # Return max height (<= chosen) or None for "best".
     # Show a small, user-friendly menu.
@@ -146,7 +352,7 @@ def _prompt_quality_choice(heights: list[int]) -> Optional[int]:
     for h in heights:
         if h not in presets:
             presets.append(h)
-        if len(presets) >= 6:
+        if len(presets) >= _QUALITY_PRESETS_MAX:
             break
 
     if len(presets) < 2:
@@ -171,8 +377,10 @@ def _prompt_quality_choice(heights: list[int]) -> Optional[int]:
         print("Invalid choice. Enter a number from the list.")
 
 
-@dataclass(frozen=True)
+@dataclass
 class ProgressState:
+    # Last line written; shared by all concurrent downloads since they redraw
+    # the same terminal line.
     last_line: str = ""
 
 
@@ -191,30 +399,198 @@ def _format_progress_line(progress: Dict[str, Any]) -> str:
     return f"{percent} | {speed} | ETA {eta}"
 
 
-def _make_progress_hook(state: ProgressState):
-    # state (dataclass frozen) immutable; store last_line in closure cell
-    last_line_holder = {"line": state.last_line}
+class _ThroughputMeter:
+    """Bytes downloaded across all concurrent downloads, from yt-dlp progress ticks."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._last: dict[str, int] = {}
+        self._bytes = 0
+        self._since = time.monotonic()
+
+    def update(self, progress: Dict[str, Any]) -> None:
+        filename = progress.get("filename")
+        downloaded = progress.get("downloaded_bytes")
+        if not isinstance(filename, str) or not isinstance(downloaded, int):
+            return
+        with self._lock:
+            delta = downloaded - self._last.get(filename, 0)
+            self._last[filename] = downloaded
+            if delta > 0:
+                self._bytes += delta
+
+    def take_rate(self) -> float:
+        """Bytes per second since the previous call."""
+
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._since
+            rate = self._bytes / elapsed if elapsed > 0 else 0.0
+            self._bytes = 0
+            self._since = now
+        return rate
+
+
+class _AdaptiveLimit:
+    """Counting semaphore whose limit can be changed while permits are held."""
+
+    def __init__(self, limit: int) -> None:
+        self._cond = threading.Condition()
+        self._limit = limit
+        self._active = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    def set_limit(self, limit: int) -> None:
+        with self._cond:
+            self._limit = limit
+            self._cond.notify_all()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._active >= self._limit:
+                self._cond.wait()
+            self._active += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+
+# Adaptive concurrency: every window, add a download while throughput keeps
+# rising; halve on a throughput drop or a failed download (AIMD).
+_MAX_CONCURRENCY = 8
+_CONTROL_INTERVAL_SEC = 5.0
+_GROW_RATIO = 1.10
+_SHRINK_RATIO = 0.80
+
+
+def _control_concurrency(
+    limit: _AdaptiveLimit,
+    meter: _ThroughputMeter,
+    errors: list[BaseException],
+    done: threading.Event,
+    *,
+    max_limit: int,
+) -> None:
+    smoothed: Optional[float] = None
+    seen_errors = 0
+    while not done.wait(_CONTROL_INTERVAL_SEC):
+        rate = meter.take_rate()
+        previous = smoothed
+        smoothed = rate if smoothed is None else 0.5 * smoothed + 0.5 * rate
+        new_errors = len(errors) > seen_errors
+        seen_errors = len(errors)
+
+        if previous is None:
+            continue
+        if new_errors or smoothed < previous * _SHRINK_RATIO:
+            limit.set_limit(max(1, limit.limit // 2))
+        elif smoothed >= previous * _GROW_RATIO:
+            limit.set_limit(min(max_limit, limit.limit + 1))
+
+
+# Serializes progress output from concurrent downloads.
+_PROGRESS_LOCK = threading.Lock()
+
+
+def _progress_writer() -> Callable[[str], None]:
+    """Return a function writing text straight to stdout's file descriptor.
+
+    One os.write per progress frame, skipping TextIOWrapper's encode and buffer
+    layers. Falls back to sys.stdout when it has no real descriptor (e.g.
+    captured output in tests).
+    """
+
+    stdout = sys.stdout
+    try:
+        fd = stdout.fileno()
+        # Anything already buffered must come out before our direct writes.
+        stdout.flush()
+    except Exception:
+
+        def write_text(text: str) -> None:
+            stdout.write(text)
+            stdout.flush()
+
+        return write_text
+
+    encoding = getattr(stdout, "encoding", None) or "utf-8"
+
+    def write_fd(text: str) -> None:
+        data = text.encode(encoding, "replace")
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+
+    return write_fd
+
+
+def _make_progress_hook(
+    state: ProgressState,
+    *,
+    prefix: str = "",
+    meter: Optional[_ThroughputMeter] = None,
+):
+    try:
+        interactive = sys.stdout.isatty()
+    except Exception:
+        interactive = False
+    # Latest line of this download; printed once on completion when not on a terminal.
+    own_line = [""]
+    write = _progress_writer()
 
     def hook(progress: Dict[str, Any]) -> None:
         status = progress.get("status")
 
+        if meter is not None:
+            meter.update(progress)
+
         if status == "downloading":
-            line = _format_progress_line(progress)
-            # Rewrite the same terminal line.
-            # Add spaces to overwrite the tail of the previous line.
-            pad = max(0, len(last_line_holder["line"]) - len(line))
-            sys.stdout.write("\r" + line + (" " * pad))
-            sys.stdout.flush()
-            last_line_holder["line"] = line
+            line = prefix + _format_progress_line(progress)
+            own_line[0] = line
+            if not interactive:
+                # Redrawing a line only makes sense on a terminal; skip the churn
+                # when output goes to a pipe or a file.
+                return
+            # Held across the write so concurrent downloads never cut into
+            # each other's line.
+            with _PROGRESS_LOCK:
+                if line == state.last_line:
+                    return
+                # Rewrite the same terminal line in one write.
+                # Add spaces to overwrite the tail of the previous line.
+                pad = max(0, len(state.last_line) - len(line))
+                write("\r" + line + (" " * pad))
+                state.last_line = line
 
         elif status == "finished":
             # Print a newline after progress so the next output starts on a new line.
-            sys.stdout.write("\n")
-            sys.stdout.flush()
+            with _PROGRESS_LOCK:
+                write("\n" if interactive else own_line[0] + "\n")
+                state.last_line = ""
 
     return hook
 
 
+def _print_progress_event(state: ProgressState, text: str) -> None:
+    with _PROGRESS_LOCK:
+        # Finish a half-drawn progress line first.
+        sys.stdout.write(("\n" if state.last_line else "") + text + "\n")
+        sys.stdout.flush()
+        state.last_line = ""
+
+
+# More parallel fragment connections mostly congest the link and the server.
+_MAX_CONCURRENT_FRAGMENTS = 16
+
+# Videos allowed to be in post-processing (ffmpeg merge) beyond the download limit.
+_MAX_PENDING_MERGES = 2
+
+
 def download(
     urls: list[str],
     output_dir: Path,
@@ -222,22 +598,128 @@ def download(
     max_height: Optional[int],
     ytdlp_js_runtime: Optional[str],
     ytdlp_remote_components: Optional[str],
+    concurrency: int = 1,
+    concurrent_fragments: int = 1,
 ) -> None:
-    # Keep CLI progress output format unchanged by reusing yt-dlp's raw progress dict.
-    raw_hook = _make_progress_hook(ProgressState())
-
-    download_urls(
-        urls,
-        output_dir=output_dir,
-        max_height=max_height,
-        playlist_items=None,
-        progress_cb=None,
-        ytdlp_js_runtime=ytdlp_js_runtime,
-        ytdlp_remote_components=ytdlp_remote_components,
-        raw_progress_hook=raw_hook,
-        telegram_compatibility=False,
-        allow_playlist=True,
-    )
+    """Download `urls`; several at once, starting with `concurrency` in flight.
+
+    The number of parallel downloads then adapts to measured throughput
+    (between 1 and `_MAX_CONCURRENCY`; fixed at 1 for `concurrency <= 1`).
+    Workers pull URLs from a shared queue, so a changed limit takes effect at
+    the next URL. A video's download slot is freed as soon as yt-dlp starts
+    post-processing it, so the next download overlaps its ffmpeg merge.
+    """
+
+    state = ProgressState()
+
+    def fetch(url_list: list[str], raw_hook, pp_hook=None) -> None:
+        download_urls(
+            url_list,
+            output_dir=output_dir,
+            max_height=max_height,
+            playlist_items=None,
+            progress_cb=None,
+            ytdlp_js_runtime=ytdlp_js_runtime,
+            ytdlp_remote_components=ytdlp_remote_components,
+            # Keep CLI progress output format unchanged by reusing yt-dlp's raw progress dict.
+            raw_progress_hook=raw_hook,
+            raw_postprocessor_hook=pp_hook,
+            telegram_compatibility=False,
+            allow_playlist=True,
+            concurrent_fragment_downloads=concurrent_fragments,
+        )
+
+    if len(urls) <= 1:
+        fetch(urls, _make_progress_hook(state))
+        return
+
+    total = len(urls)
+    adaptive = concurrency > 1
+    max_limit = min(_MAX_CONCURRENCY, total) if adaptive else 1
+    limit = _AdaptiveLimit(min(concurrency, max_limit))
+    meter = _ThroughputMeter()
+    errors: list[BaseException] = []
+    done = threading.Event()
+    # Set on Ctrl+C: workers stop taking new URLs.
+    cancel = threading.Event()
+
+    pending: queue.Queue[tuple[int, str]] = queue.Queue()
+    for item in enumerate(urls, start=1):
+        pending.put(item)
+
+    def worker() -> None:
+        while True:
+            limit.acquire()
+            holding = [True]
+
+            def release_slot() -> None:
+                if holding[0]:
+                    holding[0] = False
+                    limit.release()
+
+            try:
+                if cancel.is_set():
+                    return
+                try:
+                    no, url = pending.get_nowait()
+                except queue.Empty:
+                    return
+                prefix = f"[{no}/{total}] "
+                progress_hook = _make_progress_hook(state, prefix=prefix, meter=meter)
+                downloaded = [False]
+
+                def raw_hook(progress: Dict[str, Any]) -> None:
+                    if progress.get("status") == "finished":
+                        downloaded[0] = True
+                    progress_hook(progress)
+
+                def pp_hook(progress: Dict[str, Any]) -> None:
+                    if progress.get("status") != "started" or not downloaded[0]:
+                        return
+                    # Download is over; let the next one start while ffmpeg runs.
+                    release_slot()
+                    if progress.get("postprocessor") == "Merger":
+                        info = progress.get("info_dict") or {}
+                        name = Path(str(info.get("filepath") or info.get("_filename") or "")).name
+                        _print_progress_event(state, f"{prefix}Merging: {name}")
+
+                try:
+                    fetch([url], raw_hook, pp_hook)
+                except Exception as exc:
+                    errors.append(exc)
+            finally:
+                release_slot()
+
+    if adaptive:
+        controller = threading.Thread(
+            target=_control_concurrency,
+            args=(limit, meter, errors, done),
+            kwargs={"max_limit": max_limit},
+            name="download-concurrency",
+            daemon=True,
+        )
+        controller.start()
+    # One thread per possible download slot, plus a few for videos still being
+    # merged; the limit decides how many download at once. Daemon threads, so
+    # a download still in flight doesn't hold up exit after Ctrl+C.
+    thread_count = min(total, max_limit + _MAX_PENDING_MERGES)
+    workers = [
+        threading.Thread(target=worker, name=f"download-{i}", daemon=True) for i in range(thread_count)
+    ]
+    for t in workers:
+        t.start()
+    try:
+        for t in workers:
+            t.join()
+    except BaseException:
+        cancel.set()
+        raise
+    finally:
+        done.set()
+
+    if errors:
+        # Same error handling as a single download: prefer the yt-dlp error.
+        raise next((e for e in errors if isinstance(e, DownloadError)), errors[0])
 
 
 def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
@@ -262,6 +744,36 @@ def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
         action="store_true",
         help="Show a quality selection menu (if available) before downloading",
     )
+    parser.add_argument(
+        "--concurrency",
+        "-j",
+        type=int,
+        default=4,
+        help=(
+            "How many of the selected videos to start downloading at once (default: 4); "
+            "adjusted automatically to the measured throughput"
+        ),
+    )
+    parser.add_argument(
+        "--fragments",
+        "-N",
+        type=int,
+        default=4,
+        help=(
+            "Fragments of HLS/DASH videos to download in parallel "
+            f"(default: 4, at most {_MAX_CONCURRENT_FRAGMENTS})"
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't read or write the video info cache (~/.cache/telegram-media-fetcher)",
+    )
+    parser.add_argument(
+        "--refresh-metadata",
+        action="store_true",
+        help="Re-extract video info even if a cached copy exists",
+    )
     return parser.parse_args(argv)
 
 
@@ -301,22 +813,39 @@ def main(argv: Optional[list[str]] = None) -> int:
         )
         return 1
 
-    max_height: Optional[int] = None
-    if args.choose_quality:
+    # One YoutubeDL for all probing, so its connections are reused between extracts.
+    probe_ydl = YoutubeDL({**_BASE_PROBE_OPTS, **advanced_opts})
+    try:
+        # One flat pass tells whether the URL is a playlist (entries listed without
+        # resolving each one) and, for a single video, already has its formats.
+        # If the URL contains multiple videos (playlist/feed/page), offer a selection
+        # to avoid downloading everything.
+        selected_urls: list[str] = [url]
+        info: Any = None
         try:
-            with YoutubeDL(
-                {
-                    "quiet": True,
-                    "no_warnings": True,
-                    "noplaylist": True,
-                    "logger": _SilentYtDlpLogger(),
-                    **advanced_opts,
-                }
-            ) as ydl:
-                info = ydl.extract_info(url, download=False)
-            info = _extract_first_entry(info)
-            heights = available_heights(info)
-            max_height = _prompt_quality_choice(heights)
+            # Obvious single-video URLs can't be playlists; skip the page fetch.
+            if not _looks_like_single_video(url):
+                info = _cached_extract_info(
+                    probe_ydl,
+                    url,
+                    {"extract_flat": "in_playlist", "noplaylist": False, **_SKIP_MANIFESTS},
+                    use_cache=not args.no_cache,
+                    refresh=args.refresh_metadata,
+                )
+
+            if isinstance(info, dict) and info.get("_type") == "playlist":
+                raw_entries = info.get("entries") or []
+                if not isinstance(raw_entries, (list, tuple)):
+                    # A generator can only be counted by consuming it.
+                    raw_entries = list(raw_entries)
+                # Count without copying; the entries themselves are pulled lazily.
+                total = sum(1 for e in raw_entries if isinstance(e, dict))
+                if total > 1:
+                    entries = (e for e in raw_entries if isinstance(e, dict))
+                    chosen = _choose_playlist_entries(entries, total=total)
+                    urls_from_entries = [u for u in (entry_to_url(e) for e in chosen) if u]
+                    if urls_from_entries:
+                        selected_urls = urls_from_entries
         except DownloadError as exc:
             _report_cannot_download(url, exc)
             return 1
@@ -324,51 +853,51 @@ def main(argv: Optional[list[str]] = None) -> int:
             print("\nCanceled by user.")
             return 130
         except Exception:
-            # If format extraction fails, continue with "best".
-            max_height = None
-
-    print(textwrap.dedent(
-        f"""\
-        Starting download…
-        URL: {url}
-        Folder: {session_dir}
-        """
-    ).rstrip())
-
-    # If the URL contains multiple videos (playlist/feed/page), offer a selection
-    # to avoid downloading everything.
-    selected_urls: list[str] = [url]
-    try:
-        with YoutubeDL(
-            {
-                "quiet": True,
-                "no_warnings": True,
-                "extract_flat": True,
-                "skip_download": True,
-                "noplaylist": False,
-                "logger": _SilentYtDlpLogger(),
-                **advanced_opts,
-            }
-        ) as ydl:
-            info = ydl.extract_info(url, download=False)
-
-        if isinstance(info, dict) and info.get("_type") == "playlist":
-            raw_entries = info.get("entries") or []
-            entries: list[Dict[str, Any]] = [e for e in raw_entries if isinstance(e, dict)]
-            if len(entries) > 1:
-                chosen = _choose_playlist_entries(entries)
-                urls_from_entries = [u for u in (entry_to_url(e) for e in chosen) if u]
-                if urls_from_entries:
-                    selected_urls = urls_from_entries
-    except DownloadError as exc:
-        _report_cannot_download(url, exc)
-        return 1
-    except KeyboardInterrupt:
-        print("\nCanceled by user.")
-        return 130
-    except Exception:
-        # If we can't determine the list of videos, just download the original URL.
-        selected_urls = [url]
+            # If we can't determine the list of videos, just download the original URL.
+            selected_urls = [url]
+            info = None
+
+        max_height: Optional[int] = None
+        if args.choose_quality:
+            try:
+                if isinstance(info, dict) and info.get("_type", "video") == "video" and info.get("formats"):
+                    video_info = info
+                else:
+                    # Playlist (entries are flat, without formats): resolve only the
+                    # first selected video.
+                    video_info = _cached_extract_info(
+                        probe_ydl,
+                        selected_urls[0],
+                        {"noplaylist": True, **_SKIP_MANIFESTS},
+                        use_cache=not args.no_cache,
+                        refresh=args.refresh_metadata,
+                    )
+                    video_info = _extract_first_entry(video_info)
+                heights = available_heights(video_info, limit=_QUALITY_PRESETS_MAX)
+                if not heights:
+                    # Some sites only list their formats in the manifests; probe fully.
+                    video_info = _cached_extract_info(
+                        probe_ydl,
+                        selected_urls[0],
+                        {"noplaylist": True},
+                        use_cache=not args.no_cache,
+                        refresh=args.refresh_metadata,
+                    )
+                    heights = available_heights(_extract_first_entry(video_info), limit=_QUALITY_PRESETS_MAX)
+                max_height = _prompt_quality_choice(heights)
+            except DownloadError as exc:
+                _report_cannot_download(url, exc)
+                return 1
+            except KeyboardInterrupt:
+                print("\nCanceled by user.")
+                return 130
+            except Exception:
+                # If format extraction fails, continue with "best".
+                max_height = None
+    finally:
+        probe_ydl.close()
+
+    print(_START_TEMPLATE.format(url=url, session_dir=session_dir))
 
     try:
         download(
@@ -377,6 +906,8 @@ def main(argv: Optional[list[str]] = None) -> int:
             max_height=max_height,
             ytdlp_js_runtime=ytdlp_cfg.ytdlp_js_runtime,
             ytdlp_remote_components=ytdlp_cfg.ytdlp_remote_components,
+            concurrency=max(1, args.concurrency),
+            concurrent_fragments=max(1, min(args.fragments, _MAX_CONCURRENT_FRAGMENTS)),
         )
     except DownloadError as exc:
         _report_cannot_download(url, exc)
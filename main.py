@@ -2,21 +2,26 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import importlib.util
 import logging
 import sys
 from pathlib import Path
 
-from telegram.ext import Application
+from telegram.ext import AIORateLimiter, Application
 from telegram.request import HTTPXRequest
 
 from app.bot import Services, build_handlers
 from app.config import load_config, load_logging_config
+from app.download_pool import DownloadPool
+from app.downloader import find_ffmpeg, find_ffprobe
 from app.queue import DownloadQueue
-from app.state import InMemoryState
+from app.state import InMemoryState, prune_loop
 
 
 logger = logging.getLogger(__name__)
 
+_LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
 
 def _setup_logging(project_root: Path) -> None:
     cfg = load_logging_config(project_root)
@@ -25,27 +30,44 @@ def _setup_logging(project_root: Path) -> None:
     logging.basicConfig(
         level=level,
         stream=sys.stdout,
-        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        format=_LOG_FORMAT,
     )
 
 
 async def _post_init(app: Application) -> None:
     # Worker is started lazily on first interaction (when the app is running)
     # to avoid PTB warnings about tasks created before start.
-    app.bot_data.setdefault("worker_task", None)
+    app.bot_data.setdefault("worker_tasks", [])
+
+    # Plain asyncio task (not application.create_task): it only touches in-memory state.
+    services: Services = app.bot_data["services"]
+    app.bot_data["prune_task"] = asyncio.create_task(prune_loop(services.state))
 
 
 async def _post_shutdown(app: Application) -> None:
-    logger.info("Application shutdown: stopping worker")
-    task = app.bot_data.get("worker_task")
-    if task is None:
-        return
-    if getattr(task, "done", None) and task.done():
-        return
-    task.cancel()
-    with contextlib.suppress(asyncio.CancelledError):
-        await task
-    logger.info("Worker task stopped")
+    prune_task = app.bot_data.get("prune_task")
+    if prune_task is not None:
+        prune_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await prune_task
+
+    flusher = app.bot_data.get("progress_flusher")
+    if flusher is not None:
+        await flusher.stop()
+
+    logger.info("Application shutdown: stopping workers")
+    tasks = [t for t in app.bot_data.get("worker_tasks") or [] if not t.done()]
+    if tasks:
+        for task in tasks:
+            task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await asyncio.gather(*tasks, return_exceptions=True)
+        app.bot_data["worker_tasks"] = []
+        logger.info("Worker tasks stopped: %s", len(tasks))
+
+    services: Services = app.bot_data["services"]
+    if services.download_pool is not None:
+        services.download_pool.shutdown()
 
 
 def main() -> None:
@@ -55,22 +77,53 @@ def main() -> None:
 
     queue = DownloadQueue()
     state = InMemoryState(ttl_sec=cfg.selection_ttl_sec)
-    services = Services(config=cfg, queue=queue, state=state)
+    services = Services(
+        config=cfg,
+        queue=queue,
+        state=state,
+        ffmpeg_path=find_ffmpeg(),
+        ffprobe_path=find_ffprobe(),
+        download_pool=DownloadPool(
+            max_workers=max(1, cfg.worker_concurrency),
+            log_level=logging.getLogger().getEffectiveLevel(),
+            log_format=_LOG_FORMAT,
+        ),
+    )
 
+    # One pool shared by all handlers/workers, sized for bursts of edits and
+    # uploads. HTTP/2 multiplexes them over one connection when `h2` is installed.
     request = HTTPXRequest(
+        connection_pool_size=64,
         connect_timeout=cfg.bot_http_connect_timeout_sec,
         read_timeout=cfg.bot_http_read_timeout_sec,
         write_timeout=cfg.bot_http_write_timeout_sec,
         pool_timeout=cfg.bot_http_pool_timeout_sec,
+        http_version="2" if importlib.util.find_spec("h2") is not None else "1.1",
+    )
+    # Long polling gets its own small pool so a stalled getUpdates never holds
+    # a connection that a send is waiting for.
+    get_updates_request = HTTPXRequest(
+        connection_pool_size=2,
+        connect_timeout=cfg.bot_http_connect_timeout_sec,
+        read_timeout=cfg.bot_http_read_timeout_sec,
+        pool_timeout=cfg.bot_http_pool_timeout_sec,
     )
 
+    builder = Application.builder()
+    try:
+        # Pace outgoing calls below Telegram's flood limits instead of hitting 429s.
+        builder.rate_limiter(AIORateLimiter(overall_max_rate=28, max_retries=3))
+    except RuntimeError:
+        logger.warning("aiolimiter is not installed; Bot API calls are not rate limited")
+
     application = (
-        Application.builder()
+        builder
         .token(cfg.bot_token)
         .base_url(cfg.bot_api_base_url)
         .base_file_url(cfg.bot_api_file_url)
         .local_mode(cfg.bot_local_mode)
         .request(request)
+        .get_updates_request(get_updates_request)
         .post_init(_post_init)
         .post_shutdown(_post_shutdown)
         .build()